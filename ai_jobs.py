@@ -0,0 +1,138 @@
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class JobCancelled(Exception):
+    """Raised by Job.check() when the job was cancelled or ran out of time."""
+
+
+class Job:
+    """
+    One background AI search. The search function receives the job and
+    should call job.check() (or test job.should_stop()) regularly so that
+    cancellation and the time budget take effect.
+    """
+
+    def __init__(self, job_id, time_budget_ms=None, tag=None):
+        self.id = job_id
+        self.tag = tag  # What the job belongs to, e.g. a game ID
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.time_budget_ms = time_budget_ms
+        self.deadline = None
+        self.created = time.time()
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def should_stop(self):
+        """True once the job is cancelled or its time budget is used up."""
+        return self.cancel_event.is_set() or (self.deadline is not None and time.perf_counter() > self.deadline)
+
+    def check(self):
+        if self.should_stop():
+            raise JobCancelled()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def wait(self, timeout=None):
+        """Block until the job finishes or `timeout` seconds pass. Returns True if finished."""
+        return self.done_event.wait(timeout)
+
+    def as_dict(self):
+        data = {"job_id": self.id, "status": self.status}
+        if self.status == DONE:
+            data["result"] = self.result
+        elif self.status == FAILED:
+            data["message"] = self.error
+        return data
+
+
+class JobQueue:
+    """
+    Runs AI searches in a pool of `max_concurrent` worker threads.
+    At most `max_pending` jobs may be queued or running at once; submit()
+    returns None beyond that so the caller can refuse the request.
+    Finished jobs are kept for `keep_seconds` so clients can fetch them.
+    """
+
+    def __init__(self, max_concurrent=2, max_pending=8, keep_seconds=300):
+        self.max_pending = max_pending
+        self.keep_seconds = keep_seconds
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="ai-job")
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, function, time_budget_ms=None, tag=None):
+        """Queue function(job). Returns the Job, or None if too many jobs are pending."""
+        with self.lock:
+            self.forget_old_jobs()
+            pending = sum(1 for job in self.jobs.values() if job.status in (QUEUED, RUNNING))
+            if pending >= self.max_pending:
+                return None
+            # Unguessable, as a job ID is all a client needs to fetch or cancel it
+            job = Job(secrets.token_urlsafe(16), time_budget_ms, tag)
+            self.jobs[job.id] = job
+        self.executor.submit(self.run, job, function)
+        return job
+
+    def run(self, job, function):
+        if job.cancel_event.is_set():
+            job.status = CANCELLED
+            job.done_event.set()
+            return
+        job.status = RUNNING
+        try:
+            if job.time_budget_ms is not None:
+                # The budget starts when a worker picks the job up
+                job.deadline = time.perf_counter() + job.time_budget_ms / 1000
+            job.result = function(job)
+            job.status = DONE
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as error:
+            job.error = str(error)
+            job.status = FAILED
+        finally:
+            job.done_event.set()
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def pending_job(self, tag):
+        """The queued or running job with this tag, if any."""
+        with self.lock:
+            for job in self.jobs.values():
+                if job.tag == tag and job.status in (QUEUED, RUNNING):
+                    return job
+        return None
+
+    def cancel(self, tag=None):
+        """Cancel the unfinished jobs with this tag (all jobs if tag is None)."""
+        with self.lock:
+            for job in self.jobs.values():
+                if (tag is None or job.tag == tag) and job.status in (QUEUED, RUNNING):
+                    job.cancel()
+
+    def forget_old_jobs(self):
+        now = time.time()
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if job.done_event.is_set() and now - job.created > self.keep_seconds]:
+            del self.jobs[job_id]
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
@@ -1,8 +1,39 @@
-from flask import Flask, jsonify, request, render_template
-import random
-from game import BlokusDuoAI
+from flask import Flask, Response, g, jsonify, request, render_template
+import json
+import threading
+from ai_jobs import JobCancelled, JobQueue
+from game_store import GameStore
+from opening_book import ranked_moves
+from pieces import normalize
 
 app = Flask(__name__)
+app.config.setdefault("AI_PLAYER", "minimax")  # "random", "heuristic", "minimax" or "mcts"
+app.config.setdefault("AI_TIME_BUDGET_MS", 2000)  # Default time budget of one AI turn
+app.config.setdefault("AI_MAX_TIME_BUDGET_MS", 10000)  # Longer budgets asked for by a client are cut to this
+app.config.setdefault("AI_MAX_CONCURRENT", 2)  # Searches running at once
+app.config.setdefault("AI_MAX_PENDING", 8)  # Searches queued or running at once
+app.config.setdefault("MAX_GAMES", 1000)  # Hosted games; the least recently used are evicted
+app.config.setdefault("GAME_TTL_SECONDS", 7200)  # Games idle for longer are dropped
+app.config.setdefault("GAMES_MEMORY_MB", 512)  # Estimated memory cap of all hosted games
+app.config.setdefault("AI_PONDER", True)  # Search answers to the human's likely replies while they think
+app.config.setdefault("AI_PONDER_REPLIES", 3)  # Human replies pondered after each AI move
+app.config.setdefault("AI_PONDER_CACHE", 8)  # Pondered answers kept per game
+app.config.setdefault("AI_PONDER_MAX_CONCURRENT", 1)  # Pondering searches running at once
+
+# AI turns run in background threads; requests only submit and poll them
+job_queue = JobQueue(app.config["AI_MAX_CONCURRENT"], app.config["AI_MAX_PENDING"])
+# Pondering has its own pool so it never keeps a real AI turn waiting for a worker
+ponder_queue = JobQueue(app.config["AI_PONDER_MAX_CONCURRENT"], app.config["AI_MAX_PENDING"])
+# One engine per browser session, identified by the game_id cookie (or a game_id parameter)
+games = GameStore(app.config["MAX_GAMES"], app.config["GAME_TTL_SECONDS"], app.config["GAMES_MEMORY_MB"])
+# One engine per pondering worker thread, shared by the sessions it ponders for, so
+# pondering adds a fixed AI_PONDER_MAX_CONCURRENT engines rather than one per game
+ponder_engines = threading.local()
+
+HUMAN = "Player 1"
+AI = "Player 2"
+MARKERS = {"X": "P1", "O": "P2"}  # Engine markers -> CSS classes of the board cells
+
 
 @app.route('/')
 def index():
@@ -14,102 +45,328 @@ def favicon():
     """Serve the favicon."""
     return app.send_static_file('favicon.ico')
 
-# Initialize game state
-game = BlokusDuoAI()
-pieces = game.generate_pieces()
-game_state = {
-    "board": [[None for _ in range(14)] for _ in range(14)],
-    "current_player": "Player 1",
-    "pieces": pieces,  # Add full Blokus pieces here
-}
-
-# AI Player Logic
-def random_ai(player):
-    """Dumb AI: Randomly selects a piece and position."""
-    valid_moves = []
-    for piece_index, piece in enumerate(game_state["pieces"][player]):
-        for row in range(14):
-            for col in range(14):
-                if is_valid_move(piece, (row, col)):
-                    valid_moves.append((piece_index, (row, col)))
-    return random.choice(valid_moves) if valid_moves else None
-
-def heuristic_ai(player):
-    """Wise AI: Selects the move that maximizes board coverage."""
-    best_move = None
-    best_score = -1
-    for piece_index, piece in enumerate(game_state["pieces"][player]):
-        for row in range(14):
-            for col in range(14):
-                if is_valid_move(piece, (row, col)):
-                    # Simple heuristic: prioritize center area
-                    score = (7 - abs(row - 7)) + (7 - abs(col - 7))
-                    if score > best_score:
-                        best_score = score
-                        best_move = (piece_index, (row, col))
-    return best_move
-
-def is_valid_move(piece, position):
-    """Validate if a move is legal on the board."""
-    start_x, start_y = position
-    for dx, dy in piece:
-        x, y = start_x + dx, start_y + dy
-        if not (0 <= x < 14 and 0 <= y < 14):  # Out of bounds
-            return False
-        if game_state["board"][x][y] is not None:  # Space occupied
-            return False
-    return True
-
-def apply_move(player, piece_index, position):
-    """Apply a move to the board."""
-    piece = game_state["pieces"][player][piece_index]
-    if is_valid_move(piece, position):
-        start_x, start_y = position
-        for dx, dy in piece:
-            x, y = start_x + dx, start_y + dy
-            game_state["board"][x][y] = 'P1' if player == "Player 1" else 'P2'
-        game_state["pieces"][player].pop(piece_index)
-        return True
-    return False
+def current_session():
+    """The caller's game session, started if they have none or it was evicted."""
+    session_id = request.args.get("game_id") or request.cookies.get("game_id")
+    session = games.get(session_id) if session_id else None
+    if session is None:
+        session = games.create()
+        g.new_game_id = session.id
+    return session
+
+@app.after_request
+def set_game_cookie(response):
+    if "new_game_id" in g:
+        response.set_cookie("game_id", g.new_game_id, httponly=True, samesite="Lax")
+    return response
+
+def board_state(session):
+    """JSON view of a session's game."""
+    game = session.game
+    return {
+        "game_id": session.id,
+        "version": session.version,
+        "board": [[MARKERS.get(cell) for cell in row] for row in game.board_rows()],
+        "current_player": game.current_player,
+        "pieces": {player: [list(map(list, piece)) for piece in game.pieces[player]] for player in game.players},
+        "scores": {player: game.calculate_score(player) for player in game.players},
+        "game_over": session.skip_count >= 2,
+    }
+
+def state_response(state, session):
+    """JSON response tagged with the session's version; 304 if the client has that version."""
+    tag = f"{session.id}-{session.version}"
+    response = Response(status=304) if request.if_none_match.contains(tag) else jsonify(state)
+    response.set_etag(tag)
+    return response
+
+def play_turn(session, player, move):
+    """Play a move (or a pass if move is None) for `player`. Call with the session lock held."""
+    game = session.game
+    if move is None:
+        session.skip_count += 1
+        session.record_turn({"player": player, "pass": True})
+    else:
+        piece_index, position, cells = move
+        game.place_piece(player, piece_index, cells, position)
+        session.skip_count = 0
+        x, y = position
+        session.record_turn({
+            "player": player,
+            "piece_index": piece_index,
+            "marker": MARKERS["X" if player == "Player 1" else "O"],
+            "cells": [[x + dx, y + dy] for dx, dy in cells],
+        })
+    game.switch_player()
+
+def ai_kwargs(time_budget_ms):
+    """Arguments of the configured AI for one move within `time_budget_ms`."""
+    ai = app.config["AI_PLAYER"]
+    if ai == "minimax":
+        return {"time_budget_ms": time_budget_ms}
+    if ai == "mcts":
+        return {"iterations": None, "time_budget_ms": time_budget_ms}
+    return {}
+
+def ai_turn(job, session, generation, want_stats):
+    """
+    Background job: search a move for the AI and play it, unless the game
+    was reset meanwhile. Returns the response for the client.
+    """
+    with session.lock:
+        if job.cancelled() or generation != session.generation:
+            raise JobCancelled()
+        game = session.game
+    game.collect_stats = bool(want_stats)
+    # Cancelling the job (DELETE, reset) stops the search at its next check
+    engine_stop, game.stop_event = game.stop_event, job.cancel_event
+    try:
+        move, stats = game.choose_move(AI, app.config["AI_PLAYER"], **ai_kwargs(job.time_budget_ms))
+    finally:
+        game.stop_event = engine_stop
+    if stats is not None:
+        app.logger.info(stats.summary())
+
+    with session.lock:
+        if job.cancelled() or generation != session.generation:
+            raise JobCancelled()
+        play_turn(session, AI, move)
+        start_pondering(session)
+        response = {"status": "success", "passed": move is None, **board_state(session)}
+    if stats is not None:
+        response["stats"] = stats.as_dict()
+    return response
+
+def ponder(job, session, generation, version):
+    """
+    Background job while the human thinks: search the AI's answers to the
+    human's likeliest replies (the best by the heuristic AI's mobility
+    score) in the worker's pondering engine and cache them in the session,
+    so that the AI can answer one of those replies at once.
+    """
+    with session.lock:
+        if job.cancelled() or generation != session.generation or version != session.version:
+            raise JobCancelled()
+        game = session.game
+        state = game.game_state()
+        piece_ids = [game.catalogue.piece_id(piece) for piece in game.pieces[HUMAN]]
+        replies = ranked_moves(game, HUMAN)[:app.config["AI_PONDER_REPLIES"]]
+    engine = ponder_engine()
+    session.ponder_game = engine
+    pondered = 0
+    try:
+        for piece_index, position, cells in replies:
+            if job.cancelled():
+                raise JobCancelled()
+            after = state.play(piece_ids[piece_index], cells, position)
+            engine.load_state(after)
+            move, _ = engine.choose_move(AI, app.config["AI_PLAYER"], **ai_kwargs(app.config["AI_TIME_BUDGET_MS"]))
+            with session.lock:
+                # A stopped search's answer is only its best guess so far
+                if job.cancelled() or generation != session.generation or engine.stop_event.is_set():
+                    raise JobCancelled()
+                if move is not None:
+                    session.remember_reply(after, move, app.config["AI_PONDER_CACHE"])
+            pondered += 1
+    finally:
+        if session.ponder_game is engine:
+            session.ponder_game = None
+    return {"pondered": pondered}
+
+def ponder_engine():
+    """The calling worker thread's pondering engine, replaced once it has been stopped."""
+    engine = getattr(ponder_engines, "engine", None)
+    if engine is None or engine.stop_event.is_set():
+        engine = ponder_engines.engine = games.new_game()
+    return engine
+
+def start_pondering(session):
+    """Start pondering for the human's turn, if enabled. Call with the session lock held."""
+    if not app.config["AI_PONDER"] or session.skip_count >= 2 or session.game.current_player != HUMAN:
+        return
+    generation, version = session.generation, session.version
+    # Skipped when the pondering pool is full
+    ponder_queue.submit(lambda job: ponder(job, session, generation, version), tag=session.id)
+
+def stop_pondering(session):
+    """Cancel the session's pondering: the position it was preparing for has arrived or is gone."""
+    ponder_queue.cancel(tag=session.id)
+    engine = session.ponder_game
+    if engine is not None:
+        # Stop its running search; the worker takes a new engine for its next job
+        engine.stop_event.set()
 
 @app.route('/api/get_board', methods=['GET'])
 def get_board():
-    """Return the current board state."""
-    return jsonify(game_state)
+    """
+    Return the current board state of the caller's game. The ETag is the
+    state version: a request with a matching If-None-Match gets a 304.
+    """
+    session = current_session()
+    with session.lock:
+        return state_response(board_state(session), session)
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    """
+    The turns played since ?since=<version>, each with the board cells it
+    filled and the index of the piece it used, so a client can patch its
+    copy of the state. If those turns are no longer known (the game was
+    reset), the full state is returned with "full": true instead.
+    """
+    session = current_session()
+    with session.lock:
+        turns = session.turns_since(request.args.get("since", -1, type=int))
+        if turns is None:
+            return state_response({"full": True, **board_state(session)}, session)
+        game = session.game
+        return state_response({
+            "full": False,
+            "game_id": session.id,
+            "version": session.version,
+            "turns": turns,
+            "current_player": game.current_player,
+            "scores": {player: game.calculate_score(player) for player in game.players},
+            "game_over": session.skip_count >= 2,
+        }, session)
 
 @app.route('/api/make_move', methods=['POST'])
 def make_move():
-    """Handle a player's move or an AI move."""
-    data = request.json
-    player = game_state["current_player"]
-
-    if player == "Player 1":  # Assume Player 1 is human
-        piece_index = data['piece_index']
-        position = tuple(data['position'])
-    else:  # Assume Player 2 is AI
-        move = heuristic_ai(player)
-        if not move:
-            return jsonify({"status": "error", "message": "AI has no valid moves"}), 400
-        piece_index, position = move
-
-    success = apply_move(player, piece_index, position)
-    if success:
-        # Switch to next player
-        game_state["current_player"] = "Player 2" if player == "Player 1" else "Player 1"
-        return jsonify({"status": "success", "board": game_state["board"]})
-    else:
-        return jsonify({"status": "error", "message": "Invalid move"}), 400
+    """
+    Handle a player's move or start an AI move.
+
+    Player 1 sends "piece_index" and "position", plus the piece's
+    orientation as "cells" ([[dx, dy], ...]) or as an index "orientation"
+    into its rotations and reflections (default: as held). When they have
+    no legal move they send "pass": true.
+
+    For the AI, the search runs in the background: the response (202)
+    carries a job ID whose result is fetched from /api/jobs/<job_id>
+    (long-poll) or /api/jobs/<job_id>/events (SSE). Optional fields for the
+    AI: "time_budget_ms" (at most AI_MAX_TIME_BUDGET_MS), and "stats": true to get the AI's search
+    statistics back with its move. If the AI already searched the position
+    while Player 1 was thinking (pondering), it answers at once with a 200
+    response marked "pondered": true.
+    """
+    data = request.get_json(silent=True) or {}
+    session = current_session()
+    with session.lock:
+        game = session.game
+        if session.skip_count >= 2:
+            return jsonify({"status": "error", "message": "The game is over"}), 400
+        generation = session.generation
+
+        if game.current_player == HUMAN:
+            if data.get("pass"):
+                if game.has_legal_move(HUMAN, game.board, game.pieces, game.placed_pieces, game.frontier):
+                    return jsonify({"status": "error", "message": "You still have a legal move"}), 400
+                stop_pondering(session)
+                play_turn(session, HUMAN, None)
+                return jsonify({"status": "success", "passed": True, **board_state(session)})
+            try:
+                piece_index = int(data['piece_index'])
+                x, y = (int(v) for v in data['position'])
+                position = (x, y)
+                piece = game.pieces[HUMAN][piece_index]
+                orientations = game.orientations(piece)
+                if "cells" in data:
+                    cells = normalize([tuple(cell) for cell in data["cells"]])
+                elif "orientation" in data:
+                    cells = orientations[int(data["orientation"])]
+                else:
+                    cells = normalize(piece)
+            except (KeyError, IndexError, TypeError, ValueError):
+                return jsonify({"status": "error", "message": "Invalid move"}), 400
+            if cells not in orientations or not game.is_valid_move(HUMAN, cells, position):
+                return jsonify({"status": "error", "message": "Invalid move"}), 400
+            stop_pondering(session)
+            play_turn(session, HUMAN, (piece_index, position, cells))
+            return jsonify({"status": "success", **board_state(session)})
+
+        try:
+            time_budget_ms = float(data.get("time_budget_ms", app.config["AI_TIME_BUDGET_MS"]))
+        except (TypeError, ValueError):
+            time_budget_ms = None
+        if time_budget_ms is None or not time_budget_ms > 0:
+            return jsonify({"status": "error", "message": "time_budget_ms must be a positive number"}), 400
+        time_budget_ms = min(time_budget_ms, app.config["AI_MAX_TIME_BUDGET_MS"])
+
+        # The AI's turn: an answer found while pondering is played at once
+        move = session.pondered_reply(game.game_state())
+        if move is not None and game.is_legal_move(AI, move, game.board, game.pieces, game.placed_pieces):
+            play_turn(session, AI, move)
+            start_pondering(session)
+            return jsonify({"status": "success", "passed": False, "pondered": True, **board_state(session)})
+
+    # Otherwise search in the background. Asking again while it thinks returns the same job.
+    tag = (session.id, generation)
+    job = job_queue.pending_job(tag)
+    if job is None:
+        job = job_queue.submit(lambda job: ai_turn(job, session, generation, data.get("stats")),
+                               time_budget_ms, tag=tag)
+        if job is None:
+            return jsonify({"status": "error", "message": "Too many AI searches running, try again later"}), 429
+    return jsonify({"status": "pending", "job_id": job.id}), 202
+
+def session_job(job_id):
+    """The AI job `job_id` if it belongs to the caller's game session, else None."""
+    job = job_queue.get(job_id)
+    if job is None or job.tag[0] != current_session().id:
+        return None
+    return job
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Status of an AI job, with the move's response once it is done.
+    With ?wait=<seconds> (at most 30), wait for the job to finish first.
+    """
+    job = session_job(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+    wait = request.args.get("wait", 0, type=float)
+    job.wait(min(wait, 30) if wait > 0 else 0)
+    return jsonify(job.as_dict())
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-Sent Events: one "done" event with the job's final state, keep-alive comments until then."""
+    job = session_job(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+
+    def stream():
+        while not job.wait(15):
+            yield ": keep-alive\n\n"
+        yield f"event: done\ndata: {json.dumps(job.as_dict())}\n\n"
+
+    return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel an AI job."""
+    job = session_job(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+    job.cancel()
+    return jsonify({"status": "success", "message": "Job cancelled"})
 
 @app.route('/api/reset', methods=['POST'])
 def reset_game():
-    """Reset the game state."""
-    global game_state
-    game_state = {
-        "board": [[None for _ in range(14)] for _ in range(14)],
-        "current_player": "Player 1",
-        "pieces": {},  # Add full Blokus pieces here
-    }
+    """Start a new game in the caller's session and cancel the AI searches of the old one."""
+    session = current_session()
+    old_game = session.game
+    job_queue.cancel(tag=(session.id, session.generation))
+    stop_pondering(session)
+    # The old engine is dropped: stop its running search
+    old_game.stop_event.set()
+    games.reset(session)
     return jsonify({"status": "success", "message": "Game reset"})
 
+@app.route('/api/server_stats', methods=['GET'])
+def server_stats():
+    """Number of hosted games, their estimated memory and how many were evicted."""
+    return jsonify(games.stats())
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
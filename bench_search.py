@@ -0,0 +1,105 @@
+import io
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from game import BlokusDuoAI
+
+
+def play_random_plies(game, plies, seed):
+    """Advance `game` by `plies` random moves (quietly)."""
+    random.seed(seed)
+    with redirect_stdout(io.StringIO()):
+        for _ in range(plies):
+            move = game.random_ai(game.current_player)
+            if move:
+                piece_index, position, rotated_piece = move
+                game.place_piece(game.current_player, piece_index, rotated_piece, position)
+            game.switch_player()
+
+
+def walk_copying(game, state, player, depth):
+    """Visit every node to `depth`, copying the position for each child. Returns the node count."""
+    nodes = 1
+    if depth == 0:
+        return nodes
+    next_player = game.players[1] if player == game.players[0] else game.players[0]
+    for piece_index, position, piece in state.moves(player):
+        child = state.copy()
+        child.apply_move(player, piece_index, piece, position)
+        nodes += walk_copying(game, child, next_player, depth - 1)
+    return nodes
+
+
+def walk_make_unmake(game, state, player, depth):
+    """Visit every node to `depth` on one shared state. Returns the node count."""
+    nodes = 1
+    if depth == 0:
+        return nodes
+    next_player = game.players[1] if player == game.players[0] else game.players[0]
+    for piece_index, position, piece in state.moves(player):
+        state.apply_move(player, piece_index, piece, position)
+        nodes += walk_make_unmake(game, state, next_player, depth - 1)
+        state.undo_move()
+    return nodes
+
+
+def allocations_per_node(game, state, player):
+    """
+    Memory blocks and bytes that stay allocated for one child node, averaged
+    over the root moves: a full copy of the position versus one undo entry.
+    """
+    moves = state.moves(player)
+    results = {}
+
+    tracemalloc.start()
+    blocks = size = 0
+    children = []
+    for piece_index, position, piece in moves:
+        blocks_before = sys.getallocatedblocks()
+        size_before = tracemalloc.get_traced_memory()[0]
+        child = state.copy()
+        child.apply_move(player, piece_index, piece, position)
+        children.append(child)
+        size += tracemalloc.get_traced_memory()[0] - size_before
+        blocks += sys.getallocatedblocks() - blocks_before
+    results["copy"] = (blocks / len(moves), size / len(moves))
+    del children
+
+    blocks = size = 0
+    for piece_index, position, piece in moves:
+        blocks_before = sys.getallocatedblocks()
+        size_before = tracemalloc.get_traced_memory()[0]
+        state.apply_move(player, piece_index, piece, position)
+        size += tracemalloc.get_traced_memory()[0] - size_before
+        blocks += sys.getallocatedblocks() - blocks_before
+        state.undo_move()
+    results["make/unmake"] = (blocks / len(moves), size / len(moves))
+    tracemalloc.stop()
+    return results
+
+
+def run(backend="bitboard", plies=8, depth=2, seed=0):
+    from search_state import SearchState
+
+    game = BlokusDuoAI(backend=backend)
+    play_random_plies(game, plies, seed)
+    player = game.current_player
+
+    print(f"Backend: {backend}, position after {plies} plies, {player} to move")
+    for name, (blocks, size) in allocations_per_node(game, SearchState(game), player).items():
+        print(f"  {name:12s} {blocks:8.1f} blocks/node {size:10.1f} bytes/node")
+
+    for name, walk in [("copy", walk_copying), ("make/unmake", walk_make_unmake)]:
+        state = SearchState(game)
+        start = time.perf_counter()
+        nodes = walk(game, state, player, depth)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:12s} depth {depth}: {nodes} nodes in {elapsed:.2f}s ({1e6 * elapsed / nodes:.1f} us/node)")
+
+
+if __name__ == "__main__":
+    for backend in ["list", "bitboard"]:
+        run(backend)
@@ -0,0 +1,221 @@
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+
+from game import BlokusDuoAI
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "positions.json")
+
+# Metric name -> True if a higher value is better
+METRICS = {
+    "is_valid_move_calls_per_sec": True,
+    "get_all_moves_ms": False,
+    "evaluate_board_after_move_ms": False,
+}
+
+
+def generate_corpus(seed=2024):
+    """
+    Play one seeded random game and save the move lists that lead to the
+    benchmark positions. Moves are stored as [player, piece ID, cells, anchor]
+    so the positions replay the same way whatever the AIs do later.
+    """
+    random.seed(seed)
+    game = BlokusDuoAI(verbose=False)
+    moves = []
+    skip_count = 0
+    while skip_count < 2:
+        player = game.current_player
+        move = game.random_ai(player)
+        if move:
+            piece_index, position, rotated_piece = move
+            piece_id = game.catalogue.piece_id(game.pieces[player][piece_index])
+            moves.append([player, piece_id, [list(cell) for cell in rotated_piece], list(position)])
+            game.place_piece(player, piece_index, rotated_piece, position)
+            skip_count = 0
+        else:
+            skip_count += 1
+        game.switch_player()
+
+    positions = {
+        "empty": [],
+        "ply4": moves[:4],
+        "ply10": moves[:10],
+        "ply20": moves[:20],
+        "near_end": moves[:max(0, len(moves) - 4)],
+    }
+    os.makedirs(os.path.dirname(CORPUS_FILE), exist_ok=True)
+    with open(CORPUS_FILE, "w") as f:
+        json.dump({"seed": seed, "positions": positions}, f, indent=1)
+    return positions
+
+
+def load_corpus():
+    with open(CORPUS_FILE) as f:
+        return json.load(f)["positions"]
+
+
+def replay(moves, backend):
+    """
+    Rebuild a position from its move list. The side to move follows the last mover.
+    The opening book and the endgame solver are off so that minimax is
+    measured from every position.
+    """
+    game = BlokusDuoAI(backend=backend, verbose=False, use_book=False, endgame_time_ms=0)
+    for player, piece_id, cells, position in moves:
+        piece_index = next(i for i, piece in enumerate(game.pieces[player])
+                           if game.catalogue.piece_id(piece) == piece_id)
+        game.place_piece(player, piece_index, tuple(tuple(cell) for cell in cells), tuple(position))
+        game.current_player = player
+        game.switch_player()
+    return game
+
+
+def best_time(function, repeats):
+    """Smallest wall time over `repeats` runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_position(game, depths, repeats):
+    player = game.current_player
+    results = {}
+
+    # is_valid_move throughput: every orientation of every remaining piece at every anchor
+    orientations = [cells for piece in game.pieces[player] for cells in game.orientations(piece)]
+    anchors = [(row, col) for row in range(game.board_size) for col in range(game.board_size)]
+
+    def check_all():
+        for cells in orientations:
+            for anchor in anchors:
+                game.is_valid_move(player, cells, anchor)
+
+    calls = len(orientations) * len(anchors)
+    results["is_valid_move_calls_per_sec"] = calls / best_time(check_all, repeats) if calls else 0.0
+
+    moves = game.get_all_moves(player, game.board, game.pieces, game.placed_pieces, game.frontier)
+    results["legal_moves"] = len(moves)
+    results["get_all_moves_ms"] = 1000 * best_time(
+        lambda: game.get_all_moves(player, game.board, game.pieces, game.placed_pieces, game.frontier), repeats)
+
+    # evaluate_board_after_move: average over (up to) 20 candidate moves
+    sample = moves[::max(1, len(moves) // 20)][:20]
+
+    def evaluate_sample():
+        for piece_index, pos, ro_piece in sample:
+            pieces_copy = {p: game.pieces[p][:] for p in game.pieces}
+            pieces_copy[player].pop(piece_index)
+            placed_pieces_copy = {p: game.placed_pieces[p][:] for p in game.placed_pieces}
+            placed_pieces_copy[player].append(ro_piece)
+            game.evaluate_board_after_move(player, ro_piece, pos, pieces_copy, placed_pieces_copy,
+                                           game.copy_frontier(game.frontier))
+
+    results["evaluate_board_after_move_ms"] = (
+        1000 * best_time(evaluate_sample, repeats) / len(sample) if sample else 0.0)
+
+    for depth in depths:
+        game.transposition_table.clear()
+        start = time.perf_counter()
+        game.minimax_ai(player, depth)
+        elapsed = time.perf_counter() - start
+        results[f"minimax_depth{depth}_nodes"] = game.nodes_searched
+        results[f"minimax_depth{depth}_nodes_per_sec"] = game.nodes_searched / elapsed if elapsed > 0 else 0.0
+    return results
+
+
+def run(backend="bitboard", depths=(1, 2), repeats=3, positions=None):
+    """Measure every corpus position. Returns a JSON-serializable dict."""
+    corpus = load_corpus()
+    names = positions or list(corpus)
+    report = {
+        "meta": {
+            "backend": backend,
+            "depths": list(depths),
+            "repeats": repeats,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "positions": {},
+    }
+    for name in names:
+        with redirect_stdout(io.StringIO()):
+            game = replay(corpus[name], backend)
+        report["positions"][name] = measure_position(game, depths, repeats)
+    return report
+
+
+def compare(report, baseline, threshold=0.10):
+    """
+    Compare a report with a baseline report. Returns the list of regressions:
+    (position, metric, baseline value, new value, relative change) for every
+    metric that got worse by more than `threshold`.
+    """
+    regressions = []
+    for name, metrics in report["positions"].items():
+        old_metrics = baseline["positions"].get(name, {})
+        for metric, value in metrics.items():
+            higher_is_better = METRICS.get(metric, metric.endswith("_per_sec"))
+            if metric not in old_metrics or metric.endswith("_nodes") or metric == "legal_moves":
+                continue
+            old = old_metrics[metric]
+            if not old:
+                continue
+            change = (value - old) / old
+            if (change < -threshold) if higher_is_better else (change > threshold):
+                regressions.append((name, metric, old, value, change))
+    return regressions
+
+
+def print_report(report):
+    for name, metrics in report["positions"].items():
+        print(name)
+        for metric, value in metrics.items():
+            print(f"  {metric:36s} {value:14.2f}" if isinstance(value, float) else f"  {metric:36s} {value:14d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Blokus Duo engine benchmarks on a fixed corpus of positions")
+    parser.add_argument("--backend", choices=["list", "bitboard"], default="bitboard")
+    parser.add_argument("--depths", type=int, nargs="*", default=[1, 2], help="minimax depths to time")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--positions", nargs="*", help="subset of corpus positions")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a saved JSON report")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    parser.add_argument("--regenerate-corpus", action="store_true", help="rebuild benchmarks/positions.json")
+    args = parser.parse_args()
+
+    if args.regenerate_corpus or not os.path.exists(CORPUS_FILE):
+        generate_corpus()
+
+    report = run(args.backend, args.depths, args.repeats, args.positions)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, metric, old, new, change in regressions:
+            print(f"REGRESSION {name} {metric}: {old:.2f} -> {new:.2f} ({change:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print("No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import random
+
+
+def cell_bit(x, y, stride):
+    """Bit index of board cell (x, y) on a board padded with a one-cell border."""
+    return (x + 1) * stride + (y + 1)
+
+
+_MASK_CACHE = {}
+
+
+def piece_masks(piece, stride):
+    """
+    Precompute the masks of a piece placed at anchor (0, 0).
+    Returns (footprint, edge_halo, corner_halo, height, width).
+
+    The board is stored with a one-cell border so that the halos of a piece
+    at the origin never need negative bit indices; placing the piece at
+    (x, y) is then just a left shift by x * stride + y.
+    """
+    key = (tuple(piece), stride)
+    masks = _MASK_CACHE.get(key)
+    if masks is not None:
+        return masks
+
+    cells = set(piece)
+    footprint = 0
+    edge_halo = 0
+    corner_halo = 0
+    for dx, dy in cells:
+        footprint |= 1 << cell_bit(dx, dy, stride)
+    for dx, dy in cells:
+        for nx, ny in [(dx - 1, dy), (dx + 1, dy), (dx, dy - 1), (dx, dy + 1)]:
+            if (nx, ny) not in cells:
+                edge_halo |= 1 << cell_bit(nx, ny, stride)
+    for dx, dy in cells:
+        for nx, ny in [(dx - 1, dy - 1), (dx - 1, dy + 1), (dx + 1, dy - 1), (dx + 1, dy + 1)]:
+            bit = 1 << cell_bit(nx, ny, stride)
+            if (nx, ny) not in cells and not bit & edge_halo:
+                corner_halo |= bit
+
+    height = max(dx for dx, dy in cells) + 1
+    width = max(dy for dx, dy in cells) + 1
+    masks = (footprint, edge_halo, corner_halo, height, width)
+    _MASK_CACHE[key] = masks
+    return masks
+
+
+class CellSet:
+    """
+    Set of board cells stored as one int (bit x * size + y).
+    Membership, add and discard are O(1), iteration is in row-major order so
+    results are reproducible, and copy() only copies one int.
+    """
+
+    __slots__ = ("size", "bits")
+
+    def __init__(self, board_size, bits=None):
+        self.size = board_size
+        # All cells by default
+        self.bits = (1 << (board_size * board_size)) - 1 if bits is None else bits
+
+    def copy(self):
+        return CellSet(self.size, self.bits)
+
+    def __contains__(self, cell):
+        x, y = cell
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return False
+        return bool(self.bits >> (x * self.size + y) & 1)
+
+    def __len__(self):
+        return bin(self.bits).count("1")
+
+    def __iter__(self):
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            yield divmod(low.bit_length() - 1, self.size)
+            bits ^= low
+
+    def add(self, cell):
+        x, y = cell
+        self.bits |= 1 << (x * self.size + y)
+
+    def discard(self, cell):
+        x, y = cell
+        if 0 <= x < self.size and 0 <= y < self.size:
+            self.bits &= ~(1 << (x * self.size + y))
+
+
+class BitBoard:
+    """
+    Board backend storing each player's occupancy as one Python int.
+    Markers are the same "X"/"O" used by the list-of-lists board.
+    """
+
+    __slots__ = ("size", "stride", "bits", "start_bits")
+
+    def __init__(self, board_size, start_positions):
+        self.size = board_size
+        self.stride = board_size + 2
+        self.bits = {"X": 0, "O": 0}
+        self.start_bits = {
+            "X": 1 << cell_bit(*start_positions["Player 1"], self.stride),
+            "O": 1 << cell_bit(*start_positions["Player 2"], self.stride),
+        }
+
+    def copy(self):
+        board = BitBoard.__new__(BitBoard)
+        board.size = self.size
+        board.stride = self.stride
+        board.bits = dict(self.bits)
+        board.start_bits = self.start_bits
+        return board
+
+    def get(self, x, y):
+        """Return the marker at (x, y), or None for an empty cell."""
+        bit = 1 << cell_bit(x, y, self.stride)
+        for marker, bits in self.bits.items():
+            if bits & bit:
+                return marker
+        return None
+
+    def place(self, marker, piece, position):
+        """Mark every cell of `piece` anchored at `position` with `marker`."""
+        start_x, start_y = position
+        footprint = piece_masks(piece, self.stride)[0]
+        self.bits[marker] |= footprint << (start_x * self.stride + start_y)
+
+    def remove(self, piece, position):
+        """Clear every cell of `piece` anchored at `position`."""
+        start_x, start_y = position
+        footprint = piece_masks(piece, self.stride)[0]
+        mask = ~(footprint << (start_x * self.stride + start_y))
+        for marker in self.bits:
+            self.bits[marker] &= mask
+
+    def is_valid(self, marker, piece, position):
+        """Blokus legality of `piece` anchored at `position` for `marker`."""
+        start_x, start_y = position
+        footprint, edge_halo, corner_halo, height, width = piece_masks(piece, self.stride)
+        if start_x < 0 or start_y < 0 or start_x + height > self.size or start_y + width > self.size:
+            return False
+
+        shift = start_x * self.stride + start_y
+        own = self.bits[marker]
+        footprint <<= shift
+        if footprint & (self.bits["X"] | self.bits["O"]):
+            return False
+        if not own:  # First piece
+            return bool(footprint & self.start_bits[marker])
+        if (edge_halo << shift) & own:
+            return False
+        return bool((corner_halo << shift) & own)
+
+    def rows(self):
+        """Return the board as a list of lists of "X"/"O"/None."""
+        return [[self.get(x, y) for y in range(self.size)] for x in range(self.size)]
+
+
+def verify_against_list_board(games=20, board_size=14, full_pieces=True, seed=0):
+    """
+    Equivalence check of the bitboard legality rules against the list-of-lists
+    checker. Plays random games on the list backend and, after every move,
+    compares both checkers for every piece, orientation and anchor
+    (including anchors hanging off the board).
+    Returns the number of (piece, anchor) pairs compared.
+    """
+    from game import BlokusDuoAI
+
+    random.seed(seed)
+    compared = 0
+    for _ in range(games):
+        game = BlokusDuoAI(board_size, full_pieces=full_pieces, verbose=False)
+        all_pieces = game.generate_full_blokus_pieces(full_pieces)
+        skip_count = 0
+        while skip_count < 2:
+            bit_board = BitBoard(board_size, game.start_positions)
+            for x, row in enumerate(game.board):
+                for y, cell in enumerate(row):
+                    if cell is not None:
+                        bit_board.place(cell, [(0, 0)], (x, y))
+
+            for player in game.players:
+                marker = "X" if player == "Player 1" else "O"
+                for piece in all_pieces:
+                    for rotated_piece in game.orientations(piece):
+                        for row in range(-2, board_size + 1):
+                            for col in range(-2, board_size + 1):
+                                expected = game.is_valid_move(player, rotated_piece, (row, col))
+                                actual = bit_board.is_valid(marker, rotated_piece, (row, col))
+                                if expected != actual:
+                                    raise AssertionError(
+                                        f"Mismatch for {player} piece {rotated_piece} at {(row, col)}: "
+                                        f"list={expected} bitboard={actual}"
+                                    )
+                                compared += 1
+
+            valid_moves = []
+            for piece_index, piece in enumerate(game.pieces[game.current_player]):
+                for rotated_piece in game.orientations(piece):
+                    for row in range(board_size):
+                        for col in range(board_size):
+                            if game.is_valid_move(game.current_player, rotated_piece, (row, col)):
+                                valid_moves.append((piece_index, (row, col), rotated_piece))
+            if valid_moves:
+                piece_index, position, rotated_piece = random.choice(valid_moves)
+                game.place_piece(game.current_player, piece_index, rotated_piece, position)
+                skip_count = 0
+            else:
+                skip_count += 1
+            game.switch_player()
+    return compared
+
+
+if __name__ == "__main__":
+    compared = verify_against_list_board(games=3)
+    print(f"Bitboard legality matches the list board on {compared} placements.")
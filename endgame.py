@@ -0,0 +1,182 @@
+import math
+import time
+
+from search_state import SearchState
+
+
+class SolverBudgetExceeded(Exception):
+    """Raised when the endgame solve runs out of time or nodes, or the engine is stopped."""
+
+
+class EndgameSolver:
+    """
+    Exact alpha-beta search to the end of the game.
+
+    The value of a position is the final score margin (Player 2's remaining
+    squares minus Player 1's, like static_evaluation), so it is exact rather
+    than a heuristic. A player without a move passes; the game ends when
+    neither can move. Results are memoised by Zobrist key as (lower, upper)
+    bounds, for at most `max_entries` positions. If the solve needs more
+    than `time_budget_ms` or `max_nodes`, SolverBudgetExceeded is raised and
+    nothing is returned, so an answer is always the proven optimum.
+    """
+
+    def __init__(self, game, time_budget_ms=2000, max_nodes=None, max_entries=200000):
+        self.game = game
+        self.time_budget_ms = time_budget_ms
+        self.max_nodes = max_nodes
+        self.max_entries = max_entries
+        self.memo = {}
+        self.nodes = 0
+        self.deadline = None
+
+    def other(self, player):
+        players = self.game.players
+        return players[1] if player == players[0] else players[0]
+
+    def solve(self, player, state=None):
+        """
+        Solve the position with `player` to move. Returns (best_move, margin);
+        best_move is None if the player has to pass.
+        """
+        game = self.game
+        state = SearchState(game) if state is None else state
+        self.nodes = 0
+        self.deadline = None if self.time_budget_ms is None else time.perf_counter() + self.time_budget_ms / 1000
+
+        moves = list(state.iter_moves(player))
+        if not moves:
+            return None, self.search(state, player, -math.inf, math.inf)
+        maximizing = player == game.maximizing_player
+        best_move, best_value = None, -math.inf if maximizing else math.inf
+        alpha, beta = -math.inf, math.inf
+        for move in moves:
+            piece_index, position, piece = move
+            state.apply_move(player, piece_index, piece, position)
+            try:
+                value = self.search(state, self.other(player), alpha, beta)
+            finally:
+                state.undo_move()
+            if (value > best_value) if maximizing else (value < best_value):
+                best_move, best_value = move, value
+                if maximizing:
+                    alpha = value
+                else:
+                    beta = value
+        return best_move, best_value
+
+    def search(self, state, player, alpha, beta):
+        self.nodes += 1
+        if self.nodes & 63 == 0:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SolverBudgetExceeded()
+            if self.max_nodes is not None and self.nodes > self.max_nodes:
+                raise SolverBudgetExceeded()
+            if self.game.stop_event.is_set():
+                raise SolverBudgetExceeded()
+
+        key = state.key(player)
+        lower, upper = self.memo.get(key, (-math.inf, math.inf))
+        if lower >= beta:
+            return lower
+        if upper <= alpha:
+            return upper
+        if lower == upper:
+            return lower
+        alpha, beta = max(alpha, lower), min(beta, upper)
+        alpha_start, beta_start = alpha, beta
+
+        game = self.game
+        other = self.other(player)
+        maximizing = player == game.maximizing_player
+        value = -math.inf if maximizing else math.inf
+        moved = False
+        # Big pieces first (they lower the mover's remaining squares the
+        # most), generated lazily so a cutoff skips the rest
+        for piece_index, position, piece in state.iter_moves(player):
+            moved = True
+            state.apply_move(player, piece_index, piece, position)
+            try:
+                score = self.search(state, other, alpha, beta)
+            finally:
+                state.undo_move()
+            if maximizing:
+                value = max(value, score)
+                alpha = max(alpha, value)
+            else:
+                value = min(value, score)
+                beta = min(beta, value)
+            if beta <= alpha:
+                break
+        if not moved:
+            if not state.has_move(other):
+                value = game.static_evaluation(state.board, state.pieces)
+                self.memo[key] = (value, value)
+                return value
+            value = self.search(state, other, alpha, beta)
+
+        if key in self.memo or len(self.memo) < self.max_entries:
+            if value <= alpha_start:
+                self.memo[key] = (lower, value)
+            elif value >= beta_start:
+                self.memo[key] = (value, upper)
+            else:
+                self.memo[key] = (value, value)
+        return value
+
+
+def brute_force(game, state, player):
+    """Plain minimax to the game end without pruning or memo, to check the solver."""
+    other = game.players[1] if player == game.players[0] else game.players[0]
+    moves = state.moves(player)
+    if not moves:
+        if not state.has_move(other):
+            return game.static_evaluation(state.board, state.pieces)
+        return brute_force(game, state, other)
+    values = []
+    for piece_index, position, piece in moves:
+        state.apply_move(player, piece_index, piece, position)
+        values.append(brute_force(game, state, other))
+        state.undo_move()
+    return max(values) if player == game.maximizing_player else min(values)
+
+
+def verify_against_brute_force(games=5, max_moves=8, seed=0):
+    """
+    Play random games until the endgame is small enough for plain minimax
+    and check that the solver finds the same margin. Returns the number of
+    positions compared.
+    """
+    import random
+
+    from game import BlokusDuoAI
+
+    rng = random.Random(seed)
+    compared = 0
+    for _ in range(games):
+        game = BlokusDuoAI(backend="bitboard", verbose=False, use_book=False)
+        skip_count = 0
+        while skip_count < 2:
+            player = game.current_player
+            state = SearchState(game)
+            moves = state.moves(player)
+            other_moves = state.moves(game.players[1] if player == game.players[0] else game.players[0])
+            if len(moves) + len(other_moves) <= max_moves:
+                _, margin = EndgameSolver(game, time_budget_ms=None).solve(player, SearchState(game))
+                expected = brute_force(game, SearchState(game), player)
+                if margin != expected:
+                    raise AssertionError(f"Solver margin {margin} != brute force {expected}")
+                compared += 1
+            if moves:
+                piece_index, position, piece = rng.choice(moves)
+                game.place_piece(player, piece_index, piece, position)
+                skip_count = 0
+            else:
+                skip_count += 1
+            game.switch_player()
+    return compared
+
+
+if __name__ == "__main__":
+    compared = verify_against_brute_force()
+    print(f"Endgame solver matches plain minimax on {compared} positions.")
@@ -1,18 +1,88 @@
 import random
 import copy
+import itertools
 import math
+import threading
+import time
+
+from bitboard import BitBoard, CellSet
+from endgame import EndgameSolver, SolverBudgetExceeded
+from game_record import GameRecordWriter
+from game_state import GameState
+from opening_book import get_book
+from pieces import get_catalogue
+from placement_index import PlacementIndex
+from search_state import SearchState
+from search_stats import SearchStats
+from symmetry import is_self_symmetric, transpose_move, transpose_placement, unique_moves
+from transposition import EXACT, LOWER, UPPER, TranspositionTable, ZobristKeys
+
+try:
+    from mobility import MobilityEvaluator
+except ImportError:  # numpy is not installed: use the pure Python evaluator
+    MobilityEvaluator = None
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget of a move runs out or the engine is stopped."""
+
 
 class BlokusDuoAI:
-    def __init__(self, board_size=14, full_pieces=True):
+    def __init__(self, board_size=14, full_pieces=True, backend="list", tt_memory_mb=16, tt_replacement="depth",
+                 verbose=True, collect_stats=False, use_book=True, endgame_moves=16, endgame_pieces=4,
+                 endgame_time_ms=2000):
+        """
+        backend: "list" keeps the board as a list of lists of "X"/"O"/None,
+        "bitboard" stores each player's occupancy as one int (see bitboard.py).
+        tt_memory_mb, tt_replacement: size cap and replacement policy of the
+        minimax transposition table (see transposition.py).
+        verbose: print placed pieces and passes (turn off for headless games).
+        collect_stats: make choose_move return a SearchStats for every decision
+        (see search_stats.py); off by default because the counters cost time.
+        use_book: let the AIs (except random_ai) play the opening book's move
+        when the position is in it (see opening_book.py).
+        endgame_moves, endgame_pieces: minimax_ai solves the game exactly (see
+        endgame.py) once both players together have at most this many legal
+        moves or remaining pieces; endgame_time_ms caps the solve when the
+        move has no time budget of its own (0 turns the endgame solver off).
+        """
         self.board_size = board_size
-        self.board = [[None for _ in range(self.board_size)] for _ in range(self.board_size)]
-        self.pieces = self.generate_pieces(full_pieces)
+        self.verbose = verbose
+        self.full_pieces = full_pieces
+        self.backend = backend
         self.start_positions = {'Player 1': (0, 0), 'Player 2': (13, 13)}
+        # Mirror images in the main diagonal share transposition and book entries (see symmetry.py)
+        self.use_symmetry = all(x == y for x, y in self.start_positions.values())
+        self.board = self.new_board()
+        self.pieces = self.generate_pieces(full_pieces)
+        self.catalogue = get_catalogue(self.generate_full_blokus_pieces(full_pieces))
         self.players = ['Player 1', 'Player 2']
         self.current_player = self.players[0]
         self.placed_pieces = {'Player 1': [], 'Player 2': []}
         self.maximizing_player = 'Player 1'
         self.valid_pos = self.initial_valid_pos()
+        self.frontier = self.initial_frontier()
+        self.zobrist = ZobristKeys(self.board_size, len(self.catalogue.pieces), self.players)
+        self.tt_memory_mb = tt_memory_mb
+        self.transposition_table = TranspositionTable(tt_memory_mb, tt_replacement)
+        self.parallel_searcher = None
+        self.mcts_pool = None
+        self.mcts_stats = None
+        self.search_deadline = None
+        # Set from another thread to stop this engine's searches for good: minimax
+        # returns its best move so far, the endgame solver gives up and MCTS ends.
+        # Nothing clears it, so a stopped engine should be discarded; to stop a
+        # single search instead, swap in an event of its own for that search.
+        self.stop_event = threading.Event()
+        self.nodes_searched = 0  # Nodes visited by the last minimax_ai call
+        self.collect_stats = collect_stats
+        self.stats = None  # SearchStats of the decision in progress, None when not collecting
+        self.use_book = use_book
+        self.endgame_moves = endgame_moves
+        self.endgame_pieces = endgame_pieces
+        self.endgame_time_ms = endgame_time_ms
+        self.endgame_margin = None  # Proven final margin found by the last minimax_ai call, if it solved the endgame
+        self.mobility_evaluator = None  # Built on first use by evaluate_board_after_move
+        self.placement_index = None  # Built on first use by heuristic_ai, then kept up to date by place_piece
     
     def generate_full_blokus_pieces(self, full_pieces=True):
         """Generate the complete set of Blokus Duo pieces."""
@@ -77,6 +147,10 @@ class BlokusDuoAI:
             normalized = [(x - min_x, y - min_y) for x, y in current]
             rotations.add(tuple(normalized)) 
         return [list(r) for r in rotations]  
+
+    def orientations(self, piece):
+        """All rotations and reflections of a piece, looked up from the piece catalogue."""
+        return [orientation.cells for orientation in self.catalogue.orientations_of(piece)]
     
     def generate_pieces(self, full_pieces):
         """Generate full Blokus Duo pieces for each player."""
@@ -85,12 +159,58 @@ class BlokusDuoAI:
             "Player 2": self.generate_full_blokus_pieces(full_pieces),
         }
 
+    def new_board(self):
+        """Create an empty board for the configured backend."""
+        if self.backend == "bitboard":
+            return BitBoard(self.board_size, self.start_positions)
+        return [[None for _ in range(self.board_size)] for _ in range(self.board_size)]
+
+    def copy_board(self, board):
+        """Copy a board of either backend."""
+        if isinstance(board, BitBoard):
+            return board.copy()
+        return [row[:] for row in board]
+
+    def mark_piece(self, board, player, piece, position):
+        """Write `piece` anchored at `position` onto `board` for `player`."""
+        marker = "X" if player == "Player 1" else "O"
+        if isinstance(board, BitBoard):
+            board.place(marker, piece, position)
+            return
+        start_x, start_y = position
+        for dx, dy in piece:
+            board[start_x + dx][start_y + dy] = marker
+
+    def unmark_piece(self, board, piece, position):
+        """Clear the squares of `piece` anchored at `position` on `board`."""
+        if isinstance(board, BitBoard):
+            board.remove(piece, position)
+            return
+        start_x, start_y = position
+        for dx, dy in piece:
+            board[start_x + dx][start_y + dy] = None
+
+    def cell(self, board, x, y):
+        """Return the marker at (x, y) on a board of either backend."""
+        if isinstance(board, BitBoard):
+            return board.get(x, y)
+        return board[x][y]
+
+    def board_rows(self, board=None):
+        """Return `board` (default: the current board) as a list of lists."""
+        board = self.board if board is None else board
+        if isinstance(board, BitBoard):
+            return board.rows()
+        return board
+
     def display_board(self):
         """Print the current board."""
-        for row in self.board:
+        for row in self.board_rows():
             print(' '.join(['.' if cell is None else cell[0] for cell in row]))
 
     def is_valid_move(self, player, piece, position):
+        if isinstance(self.board, BitBoard):
+            return self.board.is_valid("X" if player == "Player 1" else "O", piece, position)
         start_x, start_y = position
         # print(f"Checking move for {player}: Piece {piece} at {position}")
         has_corner_contact = False
@@ -131,12 +251,14 @@ class BlokusDuoAI:
         """Try to place a piece, checking all rotations."""
         # piece = self.pieces[player][piece_index]
         piece = rotated_piece
-        print(f"Placing piece {piece} for {player} at {position}")
-        start_x, start_y = position
-        for dx, dy in piece:
-            x, y = start_x + dx, start_y + dy
-            self.board[x][y] = "X" if player == "Player 1" else "O"
+        if self.verbose:
+            print(f"Placing piece {piece} for {player} at {position}")
+        self.mark_piece(self.board, player, piece, position)
         self.update_valid_pos(piece, position, self.valid_pos)
+        self.update_frontier(self.frontier, self.board, player, piece, position)
+        if self.placement_index is not None:
+            piece_id = self.catalogue.piece_id(self.pieces[player][piece_index])
+            self.placement_index.apply(player, piece_id, piece, position)
         self.placed_pieces[player].append(piece)
         self.pieces[player].pop(piece_index)  # Remove used piece
         return True
@@ -147,61 +269,70 @@ class BlokusDuoAI:
 
     def random_ai(self, player):
         """Dumb AI: Randomly selects a piece, rotation, and position."""
-        valid_moves = []
-        for piece_index, piece in enumerate(self.pieces[player]):
-            for row in range(self.board_size):
-                for col in range(self.board_size):
-                    for rotated_piece in self.rotate_piece(piece):
-                        if self.is_valid_move(player, rotated_piece, (row, col)):
-                            valid_moves.append((piece_index, (row, col), rotated_piece))
+        valid_moves = self.generate_root_moves(player)
         if valid_moves:
             return random.choice(valid_moves) 
-        print(f"Valid moves for {player}: {valid_moves}") 
+        if self.verbose:
+            print(f"Valid moves for {player}: {valid_moves}")
         return None  
 
     def heuristic_ai(self, player):
         """Wise AI: Selects the move that maximizes board coverage."""
+        book_move = self.book_move(player)
+        if book_move is not None:
+            return book_move
         best_move = None
         best_score = -1
-        for piece_index, piece in enumerate(self.pieces[player]):
-            ro_pieces = self.rotate_piece(piece)
-            for ro_piece in ro_pieces:
-                for pos in self.valid_pos:
-                        if self.is_valid_move(player, ro_piece, pos):
-                            # Heuristic: Maximize placement options for the next turn
-                            pieces_copy = {player: self.pieces[player][:] for player in self.pieces}
-                            pieces_copy[player].pop(piece_index)
-                            placed_pieces_copy = {player: self.placed_pieces[player][:] for player in self.placed_pieces}
-                            placed_pieces_copy[player].append(piece)
-                            valid_pos_copy = self.valid_pos[:]
-                            self.update_valid_pos(piece, pos, valid_pos_copy)
-                            score = self.evaluate_board_after_move(player, ro_piece, pos, pieces_copy, placed_pieces_copy, valid_pos_copy)
-                            if score > best_score:
-                                best_score = score
-                                best_move = (piece_index, pos, ro_piece)
+        stats = self.stats
+        moves = self.generate_root_moves(player)
+        if self.use_symmetry and is_self_symmetric(self, self.board):
+            moves = unique_moves(moves)
+        index = self.get_placement_index()
+        piece_ids = [self.catalogue.piece_id(piece) for piece in self.pieces[player]]
+        for piece_index, pos, ro_piece in moves:
+            # Heuristic: Maximize placement options for the next turn
+            if stats is None:
+                score = index.mobility_after(player, piece_ids[piece_index], ro_piece, pos)
+            else:
+                start = time.perf_counter()
+                score = index.mobility_after(player, piece_ids[piece_index], ro_piece, pos)
+                stats.eval_seconds += time.perf_counter() - start
+                stats.leaf_evaluations += 1
+                stats.nodes += 1
+            if score > best_score:
+                best_score = score
+                best_move = (piece_index, pos, ro_piece)
         return best_move
 
-    def evaluate_board_after_move(self, player, piece, position, pieces, placed_pieces_copy, valid_pos_copy):
-        """Evaluate board based on the number of valid moves after placing a piece."""
-        # Simplified heuristic: Favor moves that maximize valid positions
-        temp_board = [row[:] for row in self.board]
-        start_x, start_y = position
-        for dx, dy in piece:
-            x, y = start_x + dx, start_y + dy
-            temp_board[x][y] = "X" if player == "Player 1" else "O"
+    def generate_root_moves(self, player):
+        """All moves of `player` in the current position, timed when collecting stats."""
+        if self.stats is None:
+            return self.get_all_moves(player, self.board, self.pieces, self.placed_pieces, self.frontier)
+        return self.stats.generate_moves(SearchState(self), player, 0)
 
+    def get_placement_index(self):
+        """The PlacementIndex of the current position (see placement_index.py), built on first use."""
+        if self.placement_index is None:
+            self.placement_index = PlacementIndex(self)
+        return self.placement_index
 
-        valid_positions = 0
-        for piece in pieces[player]:
-            rotated_pieces = self.rotate_piece(piece)
-            for rotated_piece in rotated_pieces:
-                placed_pieces_copy[player].append(piece)
+    def evaluate_board_after_move(self, player, piece, position, pieces, placed_pieces_copy, frontier_copy,
+                                  vectorized=True):
+        """
+        Evaluate board based on the number of valid moves after placing a piece.
+        Uses the numpy MobilityEvaluator when available (same counts, see mobility.py).
+        """
+        if vectorized and MobilityEvaluator is not None:
+            if self.mobility_evaluator is None:
+                self.mobility_evaluator = MobilityEvaluator(self)
+            return self.mobility_evaluator.count_after_move(self, self.board, player, piece, position, pieces)
 
-                for pos in valid_pos_copy:
+        # Simplified heuristic: Favor moves that maximize valid positions
+        temp_board = self.copy_board(self.board)
+        self.mark_piece(temp_board, player, piece, position)
+        self.update_frontier(frontier_copy, temp_board, player, piece, position)
 
-                        if self.is_valid_move_sim(player, rotated_piece, pos, temp_board, placed_pieces_copy):
-                            valid_positions += 1
-        return valid_positions
+        return len(self.get_all_moves(player, temp_board, pieces, placed_pieces_copy, frontier_copy))
     
     def calculate_score(self, player):
         """
@@ -231,203 +362,673 @@ class BlokusDuoAI:
             print(f"Winner: {winner}!")
 
     def initial_valid_pos(self):
-        valid_positions = []
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                valid_positions.append((row, col))
-        return valid_positions
+        """Empty cells of the board, as a CellSet (row-major iteration, O(1) removal)."""
+        return CellSet(self.board_size)
 
     def update_valid_pos(self, piece, position, valid_positions):
         start_x, start_y = position
         for dx, dy in piece:
-            x, y = start_x + dx, start_y + dy
-            if (x, y) in valid_positions:
-                valid_positions.remove((x, y))
+            valid_positions.discard((start_x + dx, start_y + dy))
+
+    def initial_frontier(self):
+        """
+        Each player's corner attachment cells: empty cells diagonal to one of
+        the player's squares and not edge-adjacent to any of them. Before the
+        first move the only attachment cell is the player's start position.
+        """
+        return {player: {self.start_positions[player]} for player in self.players}
 
+    def copy_frontier(self, frontier):
+        return {player: set(cells) for player, cells in frontier.items()}
+
+    def update_frontier(self, frontier, board, player, piece, position):
+        """
+        Update `frontier` after `piece` was marked on `board` for `player`.
+        Only the cells around the new piece can change.
+        Returns (removed, added): the (player, cell) pairs taken out of the
+        frontier and the cells added to `player`'s attachment cells, so that
+        the update can be undone.
+        """
+        marker = "X" if player == "Player 1" else "O"
+        start_x, start_y = position
+        cells = [(start_x + dx, start_y + dy) for dx, dy in piece]
+        removed = []
+        added = []
+        for frontier_player, attachment_cells in frontier.items():
+            for cell in cells:
+                if cell in attachment_cells:
+                    attachment_cells.remove(cell)
+                    removed.append((frontier_player, cell))
+
+        own = frontier[player]
+        for x, y in cells:
+            for n in [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]:
+                if n in own:
+                    own.remove(n)
+                    removed.append((player, n))
+
+        for x, y in cells:
+            for nx, ny in [(x - 1, y - 1), (x - 1, y + 1), (x + 1, y - 1), (x + 1, y + 1)]:
+                if not (0 <= nx < self.board_size and 0 <= ny < self.board_size):
+                    continue
+                if self.cell(board, nx, ny) is not None:
+                    continue
+                touches_edge = False
+                for ex, ey in [(nx - 1, ny), (nx + 1, ny), (nx, ny - 1), (nx, ny + 1)]:
+                    if 0 <= ex < self.board_size and 0 <= ey < self.board_size:
+                        if self.cell(board, ex, ey) == marker:
+                            touches_edge = True
+                            break
+                if not touches_edge and (nx, ny) not in own:
+                    own.add((nx, ny))
+                    added.append((nx, ny))
+        return removed, added
+
+    def game_state(self):
+        """Immutable snapshot of the current position (see game_state.py)."""
+        size = self.board_size
+        occupancy = [0, 0]
+        for x, row in enumerate(self.board_rows()):
+            for y, marker in enumerate(row):
+                if marker is not None:
+                    occupancy[0 if marker == "X" else 1] |= 1 << (x * size + y)
+        remaining = [0, 0]
+        for side, player in enumerate(self.players):
+            for piece in self.pieces[player]:
+                remaining[side] |= 1 << self.catalogue.piece_id(piece)
+        return GameState(size, occupancy, remaining, self.players.index(self.current_player))
+
+    def load_state(self, state):
+        """
+        Make `state` the current position. placed_pieces gets each player's
+        placed pieces as held, since where they went is in the board.
+        """
+        all_pieces = self.generate_full_blokus_pieces(self.full_pieces)
+        self.board = self.new_board()
+        self.frontier = {}
+        for side, player in enumerate(self.players):
+            placed_ids = [piece_id for piece_id in range(len(all_pieces)) if not state.remaining[side] >> piece_id & 1]
+            self.pieces[player] = [all_pieces[piece_id] for piece_id in state.piece_ids(side)]
+            self.placed_pieces[player] = [all_pieces[piece_id] for piece_id in placed_ids]
+        for x, row in enumerate(state.rows()):
+            for y, marker in enumerate(row):
+                if marker is not None:
+                    self.mark_piece(self.board, "Player 1" if marker == "X" else "Player 2", [(0, 0)], (x, y))
+
+        empty = (1 << (self.board_size * self.board_size)) - 1
+        empty &= ~(state.occupancy[0] | state.occupancy[1])
+        self.valid_pos = CellSet(self.board_size, empty)
+        for side, player in enumerate(self.players):
+            marker = "X" if side == 0 else "O"
+            if not state.has_placed(side):
+                self.frontier[player] = {self.start_positions[player]} & set(self.valid_pos)
+                continue
+            attachment_cells = set()
+            for x, y in self.valid_pos:
+                neighbours = [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]
+                corners = [(x - 1, y - 1), (x - 1, y + 1), (x + 1, y - 1), (x + 1, y + 1)]
+                if any(self.on_board(n) and self.cell(self.board, *n) == marker for n in neighbours):
+                    continue
+                if any(self.on_board(c) and self.cell(self.board, *c) == marker for c in corners):
+                    attachment_cells.add((x, y))
+            self.frontier[player] = attachment_cells
+        self.current_player = self.players[state.to_move]
+        self.placement_index = None
+
+    def on_board(self, cell):
+        x, y = cell
+        return 0 <= x < self.board_size and 0 <= y < self.board_size
+
+    def position_hashes(self):
+        """Zobrist hashes of the current position and of its mirror image, without the side to move."""
+        return (self.zobrist.hash_position(self, self.board, self.pieces),
+                self.zobrist.hash_position(self, self.board, self.pieces, mirrored=True))
+
+    def position_key(self, player):
+        """Zobrist key of the current position with `player` to move, shared with its mirror image."""
+        h, mirror_hash = self.position_hashes()
+        if self.use_symmetry:
+            h = min(h, mirror_hash)
+        return h ^ self.zobrist.side[player]
+
+    def position_mirrored(self):
+        """True if position_key() is the key of the mirror image, so stored moves must be mirrored."""
+        h, mirror_hash = self.position_hashes()
+        return self.use_symmetry and mirror_hash < h
+
+    def book_move(self, player):
+        """The opening book's move for `player` in the current position, or None."""
+        if not self.use_book:
+            return None
+        book = get_book()
+        if book is None or not book.matches(self):
+            return None
+        if sum(len(placed) for placed in self.placed_pieces.values()) >= book.plies:
+            return None
+        entry = book.lookup(self.position_key(player))
+        if entry is None:
+            return None
+        piece_id, orientation_id, position = entry
+        cells = self.catalogue.orientations[orientation_id].cells
+        if self.position_mirrored():
+            cells, position = transpose_placement(cells, position)
+        for piece_index, piece in enumerate(self.pieces[player]):
+            if self.catalogue.piece_id(piece) == piece_id:
+                # Guard against a hash collision with a position outside the book
+                if self.is_valid_move(player, cells, position):
+                    return piece_index, position, cells
+                break
+        return None
 
-    def minimax_ai(self, player, depth=2):
+    def choose_move(self, player, ai="minimax", **kwargs):
+        """
+        Ask an AI ("random", "heuristic", "minimax", "parallel_minimax" or
+        "mcts", with its keyword arguments) for a move.
+        Returns (move, stats): stats is a SearchStats when the game was created
+        with collect_stats=True, None otherwise.
+        """
+        ai_function = getattr(self, f"{ai}_ai")
+        if not self.collect_stats:
+            return ai_function(player, **kwargs), None
+
+        stats = self.stats = SearchStats(ai)
+        start = time.perf_counter()
+        try:
+            move = ai_function(player, **kwargs)
+        finally:
+            self.stats = None
+        stats.wall_seconds = time.perf_counter() - start
+        if ai in ("minimax", "parallel_minimax"):
+            stats.nodes = self.nodes_searched
+        elif ai == "mcts":
+            stats.nodes = self.mcts_stats["playouts"]
+        return move, stats
+
+    def minimax_ai(self, player, depth=2, time_budget_ms=None):
         """
         Choose a move using minimax search.
 
         depth: how many plies deep to search
+        time_budget_ms: if given, search depth 1, 2, 3... instead and return the best
+        move of the deepest iteration that finished within the budget. The
+        budget counts from this call, so the endgame test and the move
+        generation before the search use it up too.
         """
+        if time_budget_ms is not None:
+            self.search_deadline = time.perf_counter() + time_budget_ms / 1000
+        try:
+            book_move = self.book_move(player)
+            if book_move is not None:
+                return book_move
+            # One shared state for the whole search, walked with apply_move/undo_move
+            state = SearchState(self)
+            self.transposition_table.new_search()
+            self.nodes_searched = 0
+            self.endgame_margin = None
+            if self.endgame_time_ms and self.in_endgame(player, state):
+                # Give the exact solve half of the move's remaining budget; if it runs out, search as usual
+                solve_ms = self.endgame_time_ms if time_budget_ms is None else self.remaining_ms() / 2
+                solver = EndgameSolver(self, solve_ms)
+                try:
+                    move, self.endgame_margin = solver.solve(player, state)
+                    self.nodes_searched = solver.nodes
+                    return move
+                except SolverBudgetExceeded:
+                    state = SearchState(self)
+            if time_budget_ms is None:
+                return self.minimax_root(player, depth, state)[0]
+            return self.iterative_deepening(player, self.remaining_ms(), state)
+        except SearchTimeout as timeout:
+            # Out of time (or stopped) before a search finished: the best move
+            # searched so far, or any legal move if none was searched yet
+            if getattr(timeout, "best_move", None) is not None:
+                return timeout.best_move
+            return self.first_legal_move(player, self.board, self.pieces, self.placed_pieces, self.frontier)
+        finally:
+            self.search_deadline = None
+
+    def remaining_ms(self):
+        """Milliseconds left until the search deadline."""
+        return 1000 * (self.search_deadline - time.perf_counter())
+
+    def in_endgame(self, player, state):
+        """True when the position is small enough for the exact endgame solver."""
+        if sum(len(pieces) for pieces in state.pieces.values()) <= self.endgame_pieces:
+            return True
+        other = self.players[1] if player == self.players[0] else self.players[0]
+        # Only whether the total stays within endgame_moves matters, so stop counting past it
+        limit = self.endgame_moves + 1
+        moves = sum(1 for _ in itertools.islice(state.iter_moves(player), limit))
+        if moves < limit:
+            moves += sum(1 for _ in itertools.islice(state.iter_moves(other), limit - moves))
+        return moves <= self.endgame_moves
+
+    def parallel_minimax_ai(self, player, depth=2, workers=None):
+        """
+        Minimax with the root moves searched in parallel worker processes
+        (see parallel_search.py). The worker pool is kept for later moves;
+        call close() when done.
+        """
+        from parallel_search import ParallelSearcher
+
+        book_move = self.book_move(player)
+        if book_move is not None:
+            return book_move
+        # Counts the nodes of this process and of the workers (see ParallelSearcher.search)
+        self.nodes_searched = 0
+
+        if self.parallel_searcher is None or (workers is not None and workers != self.parallel_searcher.workers):
+            self.close()
+            self.parallel_searcher = ParallelSearcher(self, workers)
+        return self.parallel_searcher.search(self, player, depth)[0]
+
+    def mcts_ai(self, player, iterations=200, time_budget_ms=None, workers=None, exploration=1.4, seed=None):
+        """
+        Monte Carlo Tree Search AI (see mcts.py): UCT over random playouts.
+        Runs `iterations` playouts and/or until `time_budget_ms`; with `workers`
+        the search runs root-parallel in that many processes. Playout counts
+        and playouts per second of the last call are kept in self.mcts_stats.
+        """
+        from mcts import MCTS, RootParallelMCTS, most_visited, root_statistics
+
+        book_move = self.book_move(player)
+        if book_move is not None:
+            self.mcts_stats = {"playouts": 0, "seconds": 0.0, "playouts_per_second": 0.0}
+            return book_move
+        start = time.perf_counter()
+        if workers is None:
+            mcts = MCTS(self, exploration, seed=seed)
+            statistics = root_statistics(mcts.search(player, iterations, time_budget_ms))
+            playouts = mcts.playouts
+        else:
+            if self.mcts_pool is None or self.mcts_pool.workers != workers:
+                if self.mcts_pool is not None:
+                    self.mcts_pool.close()
+                self.mcts_pool = RootParallelMCTS(self, workers)
+            statistics, playouts = self.mcts_pool.search(self, player, iterations, time_budget_ms, exploration, seed)
+        seconds = time.perf_counter() - start
+        self.mcts_stats = {
+            "playouts": playouts,
+            "seconds": seconds,
+            "playouts_per_second": playouts / seconds if seconds > 0 else 0.0,
+        }
+        return most_visited(statistics)
+
+    def close(self):
+        """Shut down the parallel search worker pools, if any were started."""
+        if self.parallel_searcher is not None:
+            self.parallel_searcher.close()
+            self.parallel_searcher = None
+        if self.mcts_pool is not None:
+            self.mcts_pool.close()
+            self.mcts_pool = None
+
+    def iterative_deepening(self, player, time_budget_ms, state):
+        """
+        Search with increasing depth until the time budget runs out.
+        Each iteration searches the previous best move first, and the
+        transposition table holds the best replies found so far, so deeper
+        iterations follow the previous best line and cut off sooner.
+        """
+        self.search_deadline = time.perf_counter() + time_budget_ms / 1000
+        # Every ply places a piece or passes, so this depth reaches the game end
+        max_depth = sum(len(pieces) for pieces in state.pieces.values())
+        best_move = None
+        try:
+            for depth in range(1, max_depth + 1):
+                move, score = self.minimax_root(player, depth, state, first_move=best_move)
+                best_move = move
+                if move is None:
+                    break
+        except SearchTimeout as timeout:
+            if best_move is None:
+                if not hasattr(timeout, "best_move"):
+                    raise  # Out of time while generating the root moves
+                # Not even depth 1 finished: use the best of the moves it did search
+                best_move = timeout.best_move
+        finally:
+            self.search_deadline = None
+        return best_move
+
+    def out_of_time(self):
+        """True once the running search has to stop: its deadline passed or the engine was stopped."""
+        if self.stop_event.is_set():
+            return True
+        return self.search_deadline is not None and time.perf_counter() > self.search_deadline
+
+    def minimax_root(self, player, depth, state, first_move=None):
+        """Search every move of `player` at the root. Returns (best_move, best_score)."""
         best_move = None
         # If we are the current player, we want to maximize our advantage.
         maximizing_player = True if player == self.maximizing_player else False
 
-        valid_positions = self.valid_pos[:]
-
         alpha = -math.inf
         beta = math.inf
 
         best_score = -math.inf if maximizing_player else math.inf
 
-        for piece_index, piece in enumerate(self.pieces[player]):
-            rotated_pieces = self.rotate_piece(piece)
-            for ro_piece in rotated_pieces:
-                for pos in valid_positions:
-                    if self.is_valid_move(player, ro_piece, pos):
-                        # Simulate move
-                        score = self.simulate_and_minimax(player, piece_index, ro_piece, pos, depth, alpha,
-                                                          beta, maximizing_player, valid_positions)
-
-                        if maximizing_player:
-                            if score > best_score:
-                                best_score = score
-                                best_move = (piece_index, pos, ro_piece)
-                                alpha = max(alpha, best_score)
-                        else:
-                            # If we were minimizing, but since typically minimax is from the perspective of the current player,
-                            # this code assumes "player" is always the perspective of the AI.
-                            # If you want player 2 to be minimizing, adjust logic accordingly.
-                            # Typically, we consider the AI as always maximizing from its perspective.
-                            # For a truly symmetrical minimax, you'd determine "maximizing_player" based on player identity.
-                            if score < best_score:
-                                best_score = score
-                                best_move = (piece_index, pos, ro_piece)
-                                beta = min(beta, best_score)
-
-                            # Alpha-Beta Pruning
-                            if beta <= alpha:
-                                break
+        stats = self.stats
+        if stats is None:
+            moves = state.moves(player)
+        else:
+            stats.root_depth = depth
+            moves = stats.generate_moves(state, player, 0)
+        if first_move is not None and first_move in moves:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
+        if state.self_symmetric():
+            # Mirror-image moves lead to mirror-image positions of equal value
+            moves = unique_moves(moves)
+        for piece_index, pos, ro_piece in moves:
+            # Simulate move
+            try:
+                score = self.simulate_and_minimax(player, piece_index, ro_piece, pos, depth, alpha,
+                                                  beta, maximizing_player, state)
+            except SearchTimeout as timeout:
+                timeout.best_move = best_move if best_move is not None else moves[0]
+                raise
+
+            if maximizing_player:
+                if score > best_score:
+                    best_score = score
+                    best_move = (piece_index, pos, ro_piece)
+                    alpha = max(alpha, best_score)
+            else:
+                # If we were minimizing, but since typically minimax is from the perspective of the current player,
+                # this code assumes "player" is always the perspective of the AI.
+                # If you want player 2 to be minimizing, adjust logic accordingly.
+                # Typically, we consider the AI as always maximizing from its perspective.
+                # For a truly symmetrical minimax, you'd determine "maximizing_player" based on player identity.
+                if score < best_score:
+                    best_score = score
+                    best_move = (piece_index, pos, ro_piece)
+                    beta = min(beta, best_score)
+
+                # Alpha-Beta Pruning
                 if beta <= alpha:
+                    if stats is not None:
+                        stats.count_cutoff(0)
                     break
-            if beta <= alpha:
-                break
 
-        return best_move
+        if stats is not None:
+            stats.depth_reached = depth
+        return best_move, best_score
 
-    def simulate_and_minimax(self, player, piece_index, piece, position, depth, alpha, beta, maximizing_player, valid_positions):
+    def simulate_and_minimax(self, player, piece_index, piece, position, depth, alpha, beta, maximizing_player, state):
         """
         Place the piece, switch player, and call minimax recursively.
         Returns the evaluated score of this position.
+        The move is applied to `state` and taken back before returning.
         """
-        # Create a deep copy of the game state
-        board_copy = [row[:] for row in self.board]
-        pieces_copy = {player: self.pieces[player][:] for player in self.pieces}
-        placed_pieces_copy = {player: self.placed_pieces[player][:] for player in self.placed_pieces}
-        current_player_copy = player
-        valid_pos_copy = valid_positions[:]
-
-        # Execute the move on the copied state
-        start_x, start_y = position
-        current_player_marker = "X" if player == "Player 1" else "O"
-        for dx, dy in piece:
-            x, y = start_x + dx, start_y + dy
-            board_copy[x][y] = current_player_marker
-
-        placed_pieces_copy[player].append(piece)
-        pieces_copy[player].pop(piece_index)  # remove used piece
-        self.update_valid_pos(piece, position, valid_pos_copy)
-
+        self.nodes_searched += 1
+        state.apply_move(player, piece_index, piece, position)
+        try:
+            return self.search_after_move(player, depth, alpha, beta, maximizing_player, state)
+        finally:
+            state.undo_move()
+
+    def search_after_move(self, player, depth, alpha, beta, maximizing_player, state):
         # Evaluate board now or check if game ends / no moves
+        stats = self.stats
+        # Checked before the leaves too: a node's leaf children take as long as a deeper subtree
+        if self.out_of_time():
+            raise SearchTimeout()
+
         if depth == 0:
             # Terminal node or depth limit reached - static evaluation
-            return self.static_evaluation(board_copy, pieces_copy)
+            if stats is not None:
+                return stats.evaluate(self, state.board, state.pieces)
+            return self.static_evaluation(state.board, state.pieces)
 
         # Switch player
         next_player = self.players[1] if player == self.players[0] else self.players[0]
 
         # Check if next player has moves
-        next_moves = self.get_all_moves(next_player, board_copy, pieces_copy, placed_pieces_copy, valid_pos_copy)
-        if not next_moves:
+        if stats is None:
+            next_can_move = state.has_move(next_player)
+        else:
+            next_can_move = stats.has_move(state, next_player)
+        if not next_can_move:
             # If next player cannot move, maybe the current player gets another turn or game ends
             # Check if current player can also not move
-            current_moves = self.get_all_moves(player, board_copy, pieces_copy, placed_pieces_copy, valid_pos_copy)
-            if not current_moves:
+            if stats is None:
+                current_can_move = state.has_move(player)
+            else:
+                current_can_move = stats.has_move(state, player)
+            if not current_can_move:
                 # Both cannot move: Game ends, evaluate final score
-                return self.static_evaluation(board_copy, pieces_copy)
+                if stats is not None:
+                    return stats.evaluate(self, state.board, state.pieces)
+                return self.static_evaluation(state.board, state.pieces)
             else:
                 # Next player passes, same player continues
                 # This scenario is complex, but let's say if opponent passes, we call minimax again for the same player, reducing depth.
-                return self.minimax_search(player, depth - 1, board_copy, pieces_copy, placed_pieces_copy, alpha, beta,
-                                           maximizing_player, valid_pos_copy)
+                return self.minimax_search(player, depth - 1, state, alpha, beta, maximizing_player)
         else:
             # Normal turn for next player
-            return self.minimax_search(next_player, depth - 1, board_copy, pieces_copy, placed_pieces_copy, alpha, beta,
-                                       not maximizing_player, valid_pos_copy)
+            return self.minimax_search(next_player, depth - 1, state, alpha, beta, not maximizing_player)
 
-    def minimax_search(self, player, depth, board, pieces, placed_pieces, alpha, beta, maximizing_player, valid_positions):
+    def minimax_search(self, player, depth, state, alpha, beta, maximizing_player):
         """
         The recursive minimax function that explores possible moves for `player`.
+        Moves are applied to the shared `state` and undone after each child.
         """
+        self.nodes_searched += 1
+        stats = self.stats
 
         if depth == 0:
-            return self.static_evaluation(board, pieces)
-
-        valid_pos_copy = valid_positions[:]
-        moves = self.get_all_moves(player, board, pieces, placed_pieces, valid_pos_copy)
-        if not moves:
-            # Player passes turn
-            # Check if other player also can't move
-            valid_pos_copy = valid_positions[:]
-            other_player = self.players[1] if player == self.players[0] else self.players[0]
-            other_moves = self.get_all_moves(other_player, board, pieces, placed_pieces, valid_pos_copy)
-            if not other_moves:
-                # Game over
-                return self.static_evaluation(board, pieces)
-            else:
-                # Opponent gets next turn
-                return self.minimax_search(other_player, depth - 1, board, pieces, placed_pieces, alpha, beta,
-                                           not maximizing_player, valid_pos_copy)
+            if stats is not None:
+                return stats.evaluate(self, state.board, state.pieces)
+            return self.static_evaluation(state.board, state.pieces)
+
+        if self.out_of_time():
+            raise SearchTimeout()
+
+        # Transposition table: the same position is reached through many move orders
+        tt = self.transposition_table
+        key = state.key(player)
+        mirrored = state.mirrored()
+        tt_move = None
+        entry = tt.probe(key)
+        if entry is not None:
+            tt_depth, tt_score, bound, tt_move = entry
+            if mirrored and tt_move is not None:
+                tt_move = transpose_move(tt_move)
+            if tt_depth >= depth:
+                if bound == EXACT:
+                    tt.cutoffs += 1
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return tt_score
+                if bound == LOWER:
+                    alpha = max(alpha, tt_score)
+                else:
+                    beta = min(beta, tt_score)
+                if beta <= alpha:
+                    tt.cutoffs += 1
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return tt_score
+        alpha_start, beta_start = alpha, beta
+
+        # Moves are generated lazily, so a cutoff skips the rest of the generation
+        if stats is None:
+            moves = state.iter_moves(player)
+        else:
+            ply = stats.root_depth - depth
+            moves = stats.iter_moves(state, player, ply)
+        # Search the stored best move first
+        if tt_move is not None and state.is_legal(player, tt_move):
+            moves = itertools.chain([tt_move], (move for move in moves if move != tt_move))
 
         best_score = -math.inf if maximizing_player else math.inf
+        best_move = None
 
-        for (p_index, pos, p_piece) in moves:
+        next_player = self.players[1] if player == self.players[0] else self.players[0]
+        for move in moves:
+            p_index, pos, p_piece = move
             # Simulate move
-            board_copy = [r[:] for r in board]
-            pieces_copy = {player: pieces[player][:] for player in pieces}
-            placed_pieces_copy = {player: placed_pieces[player][:] for player in placed_pieces}
-            valid_pos_copy = valid_positions[:]
-
-            start_x, start_y = pos
-            current_player_marker = "X" if player == "Player 1" else "O"
-            for dx, dy in p_piece:
-                x, y = start_x + dx, start_y + dy
-                board_copy[x][y] = current_player_marker
-
-            placed_pieces_copy[player].append(p_piece)
-            pieces_copy[player].pop(p_index)
-            self.update_valid_pos(p_piece, pos, valid_pos_copy)
-
-            next_player = self.players[1] if player == self.players[0] else self.players[0]
-
-            score = self.minimax_search(next_player, depth - 1, board_copy, pieces_copy, placed_pieces_copy, alpha,
-                                        beta, not maximizing_player, valid_pos_copy)
+            state.apply_move(player, p_index, p_piece, pos)
+            try:
+                score = self.minimax_search(next_player, depth - 1, state, alpha, beta, not maximizing_player)
+            finally:
+                state.undo_move()
 
             if maximizing_player:
                 if score > best_score:
                     best_score = score
+                    best_move = move
                 alpha = max(alpha, best_score)
             else:
                 if score < best_score:
                     best_score = score
+                    best_move = move
                 beta = min(beta, best_score)
 
             if beta <= alpha:
+                if stats is not None:
+                    stats.count_cutoff(ply)
                 break
 
+        if best_move is None:
+            # No move: the player passes
+            # Check if other player also can't move
+            if stats is None:
+                other_can_move = state.has_move(next_player)
+            else:
+                other_can_move = stats.has_move(state, next_player)
+            if not other_can_move:
+                # Game over
+                if stats is not None:
+                    return stats.evaluate(self, state.board, state.pieces)
+                return self.static_evaluation(state.board, state.pieces)
+            else:
+                # Opponent gets next turn
+                return self.minimax_search(next_player, depth - 1, state, alpha, beta, not maximizing_player)
+
+        if best_score <= alpha_start:
+            bound = UPPER
+        elif best_score >= beta_start:
+            bound = LOWER
+        else:
+            bound = EXACT
+        tt.store(key, depth, best_score, bound, transpose_move(best_move) if mirrored else best_move)
         return best_score
 
-    def get_all_moves(self, player, board, pieces, placed_pieces, valid_positions):
+    def get_all_moves(self, player, board, pieces, placed_pieces, frontier):
         """
         Generate all possible moves for `player` given the current board and piece set.
         Returns a list of tuples (piece_index, position, rotated_piece).
+
+        Only placements covering one of the player's attachment cells in
+        `frontier` are tried, and each placement is returned once.
         """
         valid_moves = []
-        for piece_index, piece in enumerate(pieces[player]):
-            rotated_pieces = self.rotate_piece(piece)
-            for ro_piece in rotated_pieces:
-                for pos in valid_positions:
-                        if self.is_valid_move_sim(player, ro_piece, pos, board, placed_pieces):
-                            valid_moves.append((piece_index, pos, ro_piece))
+        attachment_cells = sorted(frontier[player])
+        for piece_index in range(len(pieces[player])):
+            valid_moves.extend(self.piece_moves(player, piece_index, board, pieces, placed_pieces, attachment_cells))
         return valid_moves
 
+    def piece_moves(self, player, piece_index, board, pieces, placed_pieces, attachment_cells):
+        """The legal moves of one of `player`'s pieces, in the order get_all_moves lists them."""
+        valid_moves = []
+        checks = 0
+        first_move = not placed_pieces[player]
+        for orientation in self.catalogue.orientations_of(pieces[player][piece_index]):
+            self.check_search_time()
+            ro_piece = orientation.cells
+            # Any square may cover the start position; later moves touch
+            # the attachment cell with one of the piece's corner squares.
+            touching_cells = ro_piece if first_move else orientation.corner_cells
+            tried = set()
+            for fx, fy in attachment_cells:
+                for cx, cy in touching_cells:
+                    pos = (fx - cx, fy - cy)
+                    if pos in tried:
+                        continue
+                    tried.add(pos)
+                    if self.is_valid_move_sim(player, ro_piece, pos, board, placed_pieces):
+                        valid_moves.append((piece_index, pos, ro_piece))
+            checks += len(tried)
+        if self.stats is not None:
+            self.stats.legality_checks += checks
+        return valid_moves
+
+    def iter_moves(self, player, board, pieces, placed_pieces, frontier):
+        """
+        Yield the moves of get_all_moves lazily and in stages: the pieces
+        with the most squares first, since they lower the mover's remaining
+        squares the most, and within a stage the moves anchored furthest from
+        the player's start corner first. A search that cuts off after a few
+        children never generates the later stages.
+        """
+        attachment_cells = sorted(frontier[player])
+        start_x, start_y = self.start_positions[player]
+        by_size = {}
+        for piece_index, piece in enumerate(pieces[player]):
+            by_size.setdefault(len(piece), []).append(piece_index)
+        for size in sorted(by_size, reverse=True):
+            stage = []
+            for piece_index in by_size[size]:
+                stage.extend(self.piece_moves(player, piece_index, board, pieces, placed_pieces, attachment_cells))
+            stage.sort(key=lambda move: -abs(move[1][0] - start_x) - abs(move[1][1] - start_y))
+            yield from stage
+
+    def check_search_time(self):
+        """
+        Raise SearchTimeout if a timed minimax search is out of time. Called
+        for every orientation while generating moves, so that generating one
+        node's moves cannot overrun a small budget.
+        """
+        if self.search_deadline is not None and self.out_of_time():
+            raise SearchTimeout()
+
+    def has_legal_move(self, player, board, pieces, placed_pieces, frontier):
+        """True if `player` has any legal move (see first_legal_move)."""
+        return self.first_legal_move(player, board, pieces, placed_pieces, frontier) is not None
+
+    def first_legal_move(self, player, board, pieces, placed_pieces, frontier):
+        """
+        A legal move of `player`, or None. Stops at the first one found,
+        trying the smallest pieces first because they fit most often.
+        """
+        attachment_cells = frontier[player]
+        if not attachment_cells:
+            return None
+        first_move = not placed_pieces[player]
+        checks = 0
+        try:
+            for piece_index in sorted(range(len(pieces[player])), key=lambda index: len(pieces[player][index])):
+                for orientation in self.catalogue.orientations_of(pieces[player][piece_index]):
+                    ro_piece = orientation.cells
+                    touching_cells = ro_piece if first_move else orientation.corner_cells
+                    for fx, fy in attachment_cells:
+                        for cx, cy in touching_cells:
+                            checks += 1
+                            position = (fx - cx, fy - cy)
+                            if self.is_valid_move_sim(player, ro_piece, position, board, placed_pieces):
+                                return piece_index, position, ro_piece
+            return None
+        finally:
+            if self.stats is not None:
+                self.stats.legality_checks += checks
+
+    def is_legal_move(self, player, move, board, pieces, placed_pieces):
+        """True if `move` (e.g. a best move stored in the transposition table) is legal for `player`."""
+        piece_index, position, piece = move
+        if piece_index >= len(pieces[player]):
+            return False
+        if all(orientation.cells != piece for orientation in self.catalogue.orientations_of(pieces[player][piece_index])):
+            return False
+        return self.is_valid_move_sim(player, piece, position, board, placed_pieces)
+
     def is_valid_move_sim(self, player, piece, position, board, placed_pieces):
         """
         A version of is_valid_move that doesn't rely on self.placed_pieces, but uses a passed placed_pieces dictionary.
         This is needed since we are simulating states.
         """
+        if isinstance(board, BitBoard):
+            return board.is_valid("X" if player == "Player 1" else "O", piece, position)
         start_x, start_y = position
         current_player_marker = "X" if player == "Player 1" else "O"
         player_has_placed = len(placed_pieces[player]) > 0
@@ -491,37 +1092,60 @@ class BlokusDuoAI:
             remaining_squares += len(piece)
         return remaining_squares
 
-    def play(self):
-        """Main game loop for AI vs AI."""
+    def play(self, player1_ai="heuristic", player2_ai="minimax", record_file="games.blkr"):
+        """
+        Main game loop for AI vs AI.
+
+        player1_ai, player2_ai: "random", "heuristic", "minimax" or "mcts"
+        record_file: the game's moves are appended to this binary game record
+        (see game_record.py); None to not record.
+        With collect_stats=True, a SearchStats line is printed after every move.
+        """
         skip_count = 0  # Number of consecutive turns skipped
-        ai_functions = {
-            "Player 1": self.heuristic_ai,
-            "Player 2": self.minimax_ai
+        ai_options = ["random", "heuristic", "minimax", "mcts"]
+        for ai in (player1_ai, player2_ai):
+            if ai not in ai_options:
+                raise ValueError(f"Unknown AI {ai!r}, expected one of {ai_options}")
+        ai_names = {
+            "Player 1": player1_ai,
+            "Player 2": player2_ai
         }
+        recorder = GameRecordWriter(record_file, self) if record_file else None
+        if recorder is not None:
+            recorder.start_game()
         while skip_count < 2:  # Game ends when both players skip their turns
             self.display_board()
-            with open("board.txt", "a") as f:
-                for row in self.board:
-                    f.write(' '.join(['.' if cell is None else cell[0] for cell in row]) + "\n")
-                f.write("\n")
-
             print(f"\n{self.current_player}'s turn:")
 
-            move = ai_functions[self.current_player](self.current_player)
+            move, stats = self.choose_move(self.current_player, ai_names[self.current_player])
+            if stats is not None:
+                print(stats.summary())
+            if ai_names[self.current_player] == "mcts":
+                stats = self.mcts_stats
+                print(f"MCTS: {stats['playouts']} playouts in {stats['seconds']:.2f}s "
+                      f"({stats['playouts_per_second']:.0f} playouts/s)")
             if move:
                 piece_index, position, rotated_pieces = move
+                piece = self.pieces[self.current_player][piece_index]
                 if self.place_piece(self.current_player, piece_index,rotated_pieces, position):
+                    if recorder is not None:
+                        recorder.move(self.current_player, piece, rotated_pieces, position)
                     print(f"{self.current_player} placed a piece at {position}.")
                     skip_count = 0  # Reset skip count
                 else:
                     print(f"{self.current_player} could not place a piece.")
             else:
                 print(f"{self.current_player} has no valid moves and passes.")
+                if recorder is not None:
+                    recorder.pass_turn(self.current_player)
                 skip_count += 1  # Increment skip count
 
             # Switch to the next player
             self.switch_player()
 
+        if recorder is not None:
+            recorder.end_game(self.calculate_score("Player 1"), self.calculate_score("Player 2"))
+            recorder.close()
         print("Game Over!")
         self.display_scores()
 
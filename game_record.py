@@ -0,0 +1,175 @@
+import argparse
+import os
+import struct
+
+MAGIC = b"BLKR"
+VERSION = 1
+
+# File header: magic, version, board size, full piece set (0/1), number of pieces
+HEADER = struct.Struct("<4sBBBB")
+# One record per turn: kind << 1 | player index, piece ID, orientation ID, anchor x, anchor y
+RECORD = struct.Struct("<BBBBB")
+
+GAME_START = 0
+MOVE = 1
+PASS = 2
+GAME_END = 3  # anchor x, y hold the remaining squares of Player 1 and Player 2
+
+PLAYERS = ("Player 1", "Player 2")
+
+
+class GameRecordWriter:
+    """
+    Appends games to a binary record file, 5 bytes per turn.
+
+    The file starts with a header giving the board size and piece set;
+    every game is a GAME_START record, one MOVE or PASS record per turn
+    and a GAME_END record with the final scores. Pieces and orientations
+    are stored by their catalogue IDs (see pieces.py). Appending to an
+    existing file checks that its header matches the game.
+    """
+
+    def __init__(self, path, game):
+        self.catalogue = game.catalogue
+        header = HEADER.pack(MAGIC, VERSION, game.board_size, int(game.full_pieces), len(game.catalogue.pieces))
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                existing = f.read(HEADER.size)
+            if existing != header:
+                raise ValueError(f"{path} holds games with a different board size or piece set")
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "wb")
+            self.file.write(header)
+
+    def write(self, kind, player, piece_id=0, orientation_id=0, x=0, y=0):
+        self.file.write(RECORD.pack(kind << 1 | PLAYERS.index(player), piece_id, orientation_id, x, y))
+
+    def start_game(self):
+        self.write(GAME_START, PLAYERS[0])
+
+    def move(self, player, piece, rotated_piece, position):
+        """Record `player` placing `piece` (as held in their hand) as `rotated_piece` at `position`."""
+        piece_id = self.catalogue.piece_id(piece)
+        self.write(MOVE, player, piece_id, self.catalogue.orientation_id(piece_id, rotated_piece), *position)
+
+    def pass_turn(self, player):
+        self.write(PASS, player)
+
+    def end_game(self, player1_score, player2_score):
+        self.write(GAME_END, PLAYERS[0], x=player1_score, y=player2_score)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordedGame:
+    """
+    One game read back from a record file.
+    moves: (player, piece ID, orientation ID, position) per turn; a pass
+    has piece ID, orientation ID and position None.
+    scores: (Player 1, Player 2) remaining squares, None if the game was
+    not finished when the file was written.
+    """
+
+    __slots__ = ("board_size", "full_pieces", "moves", "scores")
+
+    def __init__(self, board_size, full_pieces):
+        self.board_size = board_size
+        self.full_pieces = full_pieces
+        self.moves = []
+        self.scores = None
+
+    def new_game(self):
+        from game import BlokusDuoAI
+
+        return BlokusDuoAI(self.board_size, self.full_pieces, verbose=False)
+
+    def apply(self, game, turn):
+        """Play one recorded turn on `game`."""
+        player, piece_id, orientation_id, position = turn
+        if piece_id is not None:
+            piece_index = next(i for i, piece in enumerate(game.pieces[player])
+                               if game.catalogue.piece_id(piece) == piece_id)
+            cells = game.catalogue.orientations[orientation_id].cells
+            game.place_piece(player, piece_index, cells, position)
+        game.current_player = player
+        game.switch_player()
+
+    def position_at(self, ply):
+        """A BlokusDuoAI in the position after the first `ply` turns."""
+        game = self.new_game()
+        for turn in self.moves[:ply]:
+            self.apply(game, turn)
+        return game
+
+    def boards(self):
+        """Yield the board rows before the first turn and after every turn."""
+        game = self.new_game()
+        yield game.board_rows()
+        for turn in self.moves:
+            self.apply(game, turn)
+            yield game.board_rows()
+
+
+def read_header(f):
+    magic, version, board_size, full_pieces, _ = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a Blokus game record file")
+    return board_size, bool(full_pieces)
+
+
+def read_games(path):
+    """Yield the RecordedGames of a record file one at a time."""
+    with open(path, "rb") as f:
+        board_size, full_pieces = read_header(f)
+        game = None
+        while True:
+            data = f.read(RECORD.size)
+            if len(data) < RECORD.size:
+                break
+            kind_player, piece_id, orientation_id, x, y = RECORD.unpack(data)
+            kind, player = kind_player >> 1, PLAYERS[kind_player & 1]
+            if kind == GAME_START:
+                if game is not None:
+                    yield game
+                game = RecordedGame(board_size, full_pieces)
+            elif kind == MOVE:
+                game.moves.append((player, piece_id, orientation_id, (x, y)))
+            elif kind == PASS:
+                game.moves.append((player, None, None, None))
+            elif kind == GAME_END:
+                game.scores = (x, y)
+                yield game
+                game = None
+        if game is not None:
+            yield game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show games from a Blokus game record file")
+    parser.add_argument("path")
+    parser.add_argument("--game", type=int, help="index of the game to show (default: list the games)")
+    parser.add_argument("--ply", type=int, help="show the board after this many turns (default: the end)")
+    args = parser.parse_args()
+
+    for index, recorded in enumerate(read_games(args.path)):
+        if args.game is None:
+            print(f"Game {index}: {len(recorded.moves)} turns, scores {recorded.scores}")
+        elif index == args.game:
+            ply = len(recorded.moves) if args.ply is None else args.ply
+            game = recorded.position_at(ply)
+            for row in game.board_rows():
+                print(' '.join(['.' if cell is None else cell for cell in row]))
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+class GameState:
+    """
+    Immutable snapshot of a position, small enough to hash, compare and
+    send to worker processes.
+
+    `occupancy` holds one int per player with bit x * board_size + y set
+    for each of their squares, `remaining` one int per player with bit
+    piece_id set for each piece they still hold (21 bits for the full set),
+    and `to_move` is the index of the side to move in BlokusDuoAI.players.
+    Pieces are identified by catalogue ID, so a move keeps its meaning
+    however many pieces were played before it.
+
+    BlokusDuoAI.game_state() takes a snapshot of the engine and
+    BlokusDuoAI.load_state() puts one back. Only the snapshot uses piece
+    IDs: the engine's moves and place_piece() still name a piece by its
+    index in the player's remaining pieces.
+    """
+
+    __slots__ = ("board_size", "occupancy", "remaining", "to_move")
+
+    def __init__(self, board_size, occupancy, remaining, to_move=0):
+        object.__setattr__(self, "board_size", board_size)
+        object.__setattr__(self, "occupancy", tuple(occupancy))
+        object.__setattr__(self, "remaining", tuple(remaining))
+        object.__setattr__(self, "to_move", to_move)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GameState is immutable")
+
+    def __reduce__(self):
+        return GameState, (self.board_size, self.occupancy, self.remaining, self.to_move)
+
+    def copy(self):
+        # Immutable, so a copy is the state itself
+        return self
+
+    def key(self):
+        return self.board_size, self.occupancy, self.remaining, self.to_move
+
+    def __eq__(self, other):
+        return isinstance(other, GameState) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return (f"GameState(board_size={self.board_size}, occupancy={self.occupancy}, "
+                f"remaining={self.remaining}, to_move={self.to_move})")
+
+    def cell_bits(self, cells, position):
+        """Occupancy bits of `cells` anchored at `position`."""
+        start_x, start_y = position
+        bits = 0
+        for dx, dy in cells:
+            bits |= 1 << ((start_x + dx) * self.board_size + start_y + dy)
+        return bits
+
+    def play(self, piece_id, cells, position):
+        """The state after the side to move places piece `piece_id` as `cells` at `position` (not checked)."""
+        side = self.to_move
+        occupancy = list(self.occupancy)
+        occupancy[side] |= self.cell_bits(cells, position)
+        remaining = list(self.remaining)
+        remaining[side] &= ~(1 << piece_id)
+        return GameState(self.board_size, occupancy, remaining, 1 - side)
+
+    def marker(self, x, y):
+        """"X", "O" or None for the cell (x, y)."""
+        bit = 1 << (x * self.board_size + y)
+        if self.occupancy[0] & bit:
+            return "X"
+        if self.occupancy[1] & bit:
+            return "O"
+        return None
+
+    def rows(self):
+        """The board as a list of lists of "X"/"O"/None."""
+        return [[self.marker(x, y) for y in range(self.board_size)] for x in range(self.board_size)]
+
+    def piece_ids(self, side):
+        """IDs of the pieces side `side` still holds, in increasing order."""
+        remaining = self.remaining[side]
+        return [piece_id for piece_id in range(remaining.bit_length()) if remaining >> piece_id & 1]
+
+    def has_placed(self, side):
+        return self.occupancy[side] != 0
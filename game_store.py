@@ -0,0 +1,173 @@
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from game import BlokusDuoAI
+from placement_index import PlacementIndex
+
+
+def deep_sizeof(obj, seen):
+    """Approximate bytes held by `obj` and everything it references, skipping ids in `seen`."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    elif hasattr(type(obj), "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, name), seen) for name in type(obj).__slots__ if hasattr(obj, name))
+    return size
+
+
+class GameSession:
+    """
+    One hosted game: its engine, a lock for the moves, and a generation
+    number that changes on reset so that stale AI jobs can tell.
+
+    `version` grows by one with every turn and every reset and never goes
+    back, so clients can cache by it. `history` holds the turns played
+    since the last reset; the turn that made version v is history[v - base_version - 1].
+
+    `ponder_cache` maps positions with the AI to move (as GameState) to the
+    AI's answer found while the human was thinking, least recently used first.
+    """
+
+    def __init__(self, session_id, game):
+        self.id = session_id
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.version = 0
+        self.last_access = time.time()
+        self.memory_bytes = 0
+        self.new_game(game)
+
+    def new_game(self, game):
+        self.game = game
+        self.generation += 1
+        self.version += 1
+        self.base_version = self.version  # Version of the empty board
+        self.history = []
+        self.skip_count = 0  # Consecutive passes; two end the game
+        self.ponder_cache = OrderedDict()
+        self.ponder_game = None  # Engine pondering for this game right now, so that a real move can stop it
+
+    def record_turn(self, turn):
+        """Add a played turn (a JSON-ready dict) to the history and bump the version."""
+        self.version += 1
+        turn["version"] = self.version
+        self.history.append(turn)
+
+    def remember_reply(self, state, move, max_entries):
+        """Cache the AI's `move` for `state`, dropping the least recently used entries beyond `max_entries`."""
+        self.ponder_cache[state] = move
+        self.ponder_cache.move_to_end(state)
+        while len(self.ponder_cache) > max_entries:
+            self.ponder_cache.popitem(last=False)
+
+    def pondered_reply(self, state):
+        """The AI's move cached for `state`, or None."""
+        move = self.ponder_cache.get(state)
+        if move is not None:
+            self.ponder_cache.move_to_end(state)
+        return move
+
+    def turns_since(self, version):
+        """Turns played after `version`, or None if they are not in the history (e.g. before a reset)."""
+        if not self.base_version <= version <= self.version:
+            return None
+        return self.history[version - self.base_version:]
+
+
+class GameStore:
+    """
+    Games keyed by session ID, each with its own BlokusDuoAI engine.
+
+    Sessions idle for more than `ttl_seconds` are dropped, and the least
+    recently used ones are evicted while there are more than `max_games`
+    or their estimated memory exceeds `memory_mb`. A game's estimate is
+    its size when created plus the parts that grow later: its
+    transposition table at its cap, and the placement index the heuristic
+    AI and pondering build on first use.
+    """
+
+    def __init__(self, max_games=1000, ttl_seconds=7200, memory_mb=512, tt_memory_mb=0.5, backend="bitboard"):
+        self.max_games = max_games
+        self.ttl_seconds = ttl_seconds
+        self.memory_bytes = int(memory_mb * 1024 * 1024)
+        self.tt_memory_mb = tt_memory_mb
+        self.backend = backend
+        self.sessions = OrderedDict()  # Least recently used first
+        self.lock = threading.Lock()
+        self.evicted = 0
+
+    def new_game(self):
+        return BlokusDuoAI(backend=self.backend, tt_memory_mb=self.tt_memory_mb, verbose=False)
+
+    def estimate_bytes(self, game):
+        # The piece catalogue and placement universe are shared by every game; the table counts at its cap
+        index = game.placement_index if game.placement_index is not None else PlacementIndex(game)
+        seen = {id(game.catalogue), id(game.transposition_table.slots), id(index.universe)}
+        size = deep_sizeof(game, seen) + int(self.tt_memory_mb * 1024 * 1024)
+        if game.placement_index is None:
+            size += deep_sizeof(index, seen)
+        return size
+
+    def total_bytes(self):
+        return sum(session.memory_bytes for session in self.sessions.values())
+
+    def create(self):
+        """Start a game in a new session and return the session."""
+        game = self.new_game()
+        session = GameSession(secrets.token_urlsafe(16), game)
+        session.memory_bytes = self.estimate_bytes(game)
+        with self.lock:
+            self.sessions[session.id] = session
+            self.evict()
+        return session
+
+    def get(self, session_id):
+        """The live session with this ID (marked as just used), or None."""
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            if time.time() - session.last_access > self.ttl_seconds:
+                del self.sessions[session_id]
+                self.evicted += 1
+                return None
+            session.last_access = time.time()
+            self.sessions.move_to_end(session_id)
+            return session
+
+    def reset(self, session):
+        """Give the session a fresh game."""
+        game = self.new_game()
+        with session.lock:
+            session.new_game(game)
+
+    def evict(self):
+        """Drop expired sessions, then least recently used ones down to the caps. Call with the lock held."""
+        now = time.time()
+        for session_id in [session_id for session_id, session in self.sessions.items()
+                           if now - session.last_access > self.ttl_seconds]:
+            del self.sessions[session_id]
+            self.evicted += 1
+        total = self.total_bytes()
+        while len(self.sessions) > 1 and (len(self.sessions) > self.max_games or total > self.memory_bytes):
+            _, session = self.sessions.popitem(last=False)
+            total -= session.memory_bytes
+            self.evicted += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "games": len(self.sessions),
+                "memory_mb": self.total_bytes() / (1024 * 1024),
+                "evicted": self.evicted,
+            }
@@ -0,0 +1,233 @@
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from search_state import SearchState
+
+# Move of a player who has no legal placement
+PASS = None
+
+
+class Node:
+    """Search tree node. `mover` made `move` to reach it; `to_move` plays next."""
+
+    __slots__ = ("parent", "move", "mover", "to_move", "children", "untried", "visits", "wins")
+
+    def __init__(self, parent, move, mover, to_move):
+        self.parent = parent
+        self.move = move
+        self.mover = mover
+        self.to_move = to_move
+        self.children = []
+        self.untried = None  # Legal moves not expanded yet, filled on the first visit
+        self.visits = 0
+        self.wins = 0.0
+
+
+class MCTS:
+    """
+    Monte Carlo Tree Search with UCT selection and random playouts.
+
+    Playouts use the same legality rules as the other AIs, but instead of
+    generating every move they sample (attachment cell, piece, orientation)
+    triples and play the first legal one, falling back to full move
+    generation only when sampling fails, so that passes are detected exactly.
+    """
+
+    def __init__(self, game, exploration=1.4, playout_tries=20, seed=None):
+        self.game = game
+        self.exploration = exploration
+        self.playout_tries = playout_tries
+        self.rng = random.Random(seed)
+        self.playouts = 0
+
+    def other(self, player):
+        players = self.game.players
+        return players[1] if player == players[0] else players[0]
+
+    def search(self, player, iterations=None, time_budget_ms=None, state=None):
+        """
+        Run MCTS for `player` from the game's current position (or `state`)
+        for a number of iterations and/or a time budget. Returns the root node.
+        """
+        if iterations is None and time_budget_ms is None:
+            raise ValueError("Give iterations or time_budget_ms")
+        state = SearchState(self.game) if state is None else state
+        deadline = None if time_budget_ms is None else time.perf_counter() + time_budget_ms / 1000
+        root = Node(None, None, None, player)
+
+        stop_event = self.game.stop_event
+        iteration = 0
+        while (iterations is None or iteration < iterations) and (deadline is None or time.perf_counter() < deadline):
+            if stop_event.is_set():
+                break
+            iteration += 1
+            applied = 0
+            node = root
+
+            # Selection
+            while node.untried is not None and not node.untried and node.children:
+                node = self.select_child(node)
+                applied += self.play_move(state, node.mover, node.move)
+
+            # Expansion
+            if node.untried is None:
+                node.untried = self.legal_moves(state, node.to_move)
+            if node.untried:
+                move = node.untried.pop(self.rng.randrange(len(node.untried)))
+                child = Node(node, move, node.to_move, self.other(node.to_move))
+                node.children.append(child)
+                node = child
+                applied += self.play_move(state, node.mover, move)
+
+            # Playout
+            margin, playout_moves = self.playout(state, node.to_move)
+            applied += playout_moves
+            self.playouts += 1
+            for _ in range(applied):
+                state.undo_move()
+
+            # Backpropagation
+            while node is not None:
+                node.visits += 1
+                if node.mover is not None:
+                    node.wins += self.reward(node.mover, margin)
+                node = node.parent
+        return root
+
+    def select_child(self, node):
+        log_visits = math.log(node.visits)
+        return max(
+            node.children,
+            key=lambda child: child.wins / child.visits + self.exploration * math.sqrt(log_visits / child.visits),
+        )
+
+    def legal_moves(self, state, player):
+        """Moves of `player`, [PASS] if only the opponent can move, [] at game end."""
+        moves = state.moves(player)
+        if moves:
+            return moves
+        if state.has_move(self.other(player)):
+            return [PASS]
+        return []
+
+    def play_move(self, state, player, move):
+        """Apply `move` (or pass) to `state`. Returns the number of moves to undo."""
+        if move is PASS:
+            return 0
+        piece_index, position, piece = move
+        state.apply_move(player, piece_index, piece, position)
+        return 1
+
+    def random_move(self, state, player):
+        game = self.game
+        rng = self.rng
+        attachment_cells = list(state.frontier[player])
+        remaining = state.pieces[player]
+        if not attachment_cells or not remaining:
+            return None
+        first_move = not state.placed_pieces[player]
+        for _ in range(self.playout_tries):
+            fx, fy = rng.choice(attachment_cells)
+            piece_index = rng.randrange(len(remaining))
+            orientation = rng.choice(game.catalogue.orientations_of(remaining[piece_index]))
+            cx, cy = rng.choice(orientation.cells if first_move else orientation.corner_cells)
+            position = (fx - cx, fy - cy)
+            if game.is_valid_move_sim(player, orientation.cells, position, state.board, state.placed_pieces):
+                return piece_index, position, orientation.cells
+        moves = state.moves(player)
+        return rng.choice(moves) if moves else None
+
+    def playout(self, state, player):
+        """Play random moves to the end of the game. Returns (score margin, moves applied)."""
+        applied = 0
+        # A player only gains attachment cells by placing pieces, so once
+        # they cannot move they stay blocked for the rest of the game.
+        blocked = set()
+        while len(blocked) < 2:
+            if player not in blocked:
+                move = self.random_move(state, player)
+                if move is None:
+                    blocked.add(player)
+                else:
+                    applied += self.play_move(state, player, move)
+            player = self.other(player)
+        return self.game.static_evaluation(state.board, state.pieces), applied
+
+    def reward(self, player, margin):
+        """1 for a win, 0.5 for a tie, 0 for a loss; margin > 0 favours Player 1."""
+        if margin == 0:
+            return 0.5
+        return 1.0 if (margin > 0) == (player == self.game.players[0]) else 0.0
+
+
+def root_statistics(root):
+    """{move: (visits, wins)} of the root's children."""
+    return {child.move: (child.visits, child.wins) for child in root.children}
+
+
+def most_visited(statistics):
+    if not statistics:
+        return None
+    return max(statistics, key=lambda move: statistics[move][0])
+
+
+# Set in each worker process by _init_worker
+_worker_game = None
+
+
+def _init_worker(config):
+    global _worker_game
+    from game import BlokusDuoAI
+
+    _worker_game = BlokusDuoAI(**config)
+
+
+def _search_root(player, position, iterations, time_budget_ms, exploration, seed):
+    """Worker task: an independent MCTS from the given position."""
+    _worker_game.load_state(position)
+    state = SearchState(_worker_game)
+    mcts = MCTS(_worker_game, exploration, seed=seed)
+    root = mcts.search(player, iterations, time_budget_ms, state)
+    return root_statistics(root), mcts.playouts
+
+
+class RootParallelMCTS:
+    """
+    Root parallelism: every worker process grows its own tree from the same
+    position with a different seed, and the root visit counts are summed.
+    """
+
+    def __init__(self, game, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        config = {
+            "board_size": game.board_size,
+            "full_pieces": game.full_pieces,
+            "backend": game.backend,
+        }
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(config,))
+
+    def search(self, game, player, iterations=None, time_budget_ms=None, exploration=1.4, seed=None):
+        """Returns (root statistics summed over workers, total playouts)."""
+        position = game.game_state()
+        seed = random.randrange(2 ** 32) if seed is None else seed
+        # Split the iterations; with a time budget every worker uses all of it
+        per_worker = None if iterations is None else max(1, iterations // self.workers)
+        futures = [
+            self.executor.submit(_search_root, player, position, per_worker, time_budget_ms, exploration, seed + i)
+            for i in range(self.workers)
+        ]
+        statistics = {}
+        playouts = 0
+        for future in futures:
+            worker_statistics, worker_playouts = future.result()
+            playouts += worker_playouts
+            for move, (visits, wins) in worker_statistics.items():
+                total_visits, total_wins = statistics.get(move, (0, 0.0))
+                statistics[move] = (total_visits + visits, total_wins + wins)
+        return statistics, playouts
+
+    def close(self):
+        self.executor.shutdown()
@@ -0,0 +1,142 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class MobilityEvaluator:
+    """
+    Counts a player's legal placements with a few array operations instead
+    of checking every (piece, orientation, anchor) in Python.
+
+    A placement is legal when none of its squares is forbidden (occupied,
+    edge-adjacent to the player's own squares, or off the board) and at
+    least one of them is an attachment cell (diagonal to an own square, or
+    the start position for the first piece). Every orientation fits in a
+    K x K box, so the forbidden and attachment maps are shifted by each of
+    the K * K cell offsets once; multiplying the orientations' cell masks
+    with the shifted maps then gives, for every orientation and every anchor
+    at once, how many of its squares are forbidden and how many attach.
+    """
+
+    def __init__(self, game):
+        catalogue = game.catalogue
+        self.board_size = game.board_size
+        self.start_positions = game.start_positions
+        self.catalogue = catalogue
+        self.k = max(max(o.height, o.width) for o in catalogue.orientations)
+
+        self.cell_masks = np.zeros((len(catalogue.orientations), self.k * self.k), dtype=np.float32)
+        for orientation in catalogue.orientations:
+            for dx, dy in orientation.cells:
+                self.cell_masks[orientation.id, dx * self.k + dy] = 1
+        # piece_orientations[piece_id, orientation_id] = 1 if the orientation belongs to the piece
+        self.piece_orientations = np.zeros((len(catalogue.pieces), len(catalogue.orientations)), dtype=np.int64)
+        for orientation in catalogue.orientations:
+            self.piece_orientations[orientation.piece_id, orientation.id] = 1
+
+    def board_arrays(self, game, board, player):
+        """(own, occupied) boolean arrays of `board` for `player`."""
+        marker = "X" if player == "Player 1" else "O"
+        rows = game.board_rows(board)
+        own = np.array([[cell == marker for cell in row] for row in rows], dtype=bool)
+        occupied = np.array([[cell is not None for cell in row] for row in rows], dtype=bool)
+        return own, occupied
+
+    def placements_per_orientation(self, own, occupied, first_move, start):
+        """Number of legal anchors of every orientation in the catalogue."""
+        size = self.board_size
+        edge = np.zeros_like(own)
+        edge[1:, :] |= own[:-1, :]
+        edge[:-1, :] |= own[1:, :]
+        edge[:, 1:] |= own[:, :-1]
+        edge[:, :-1] |= own[:, 1:]
+        forbidden = occupied | edge
+
+        if first_move:
+            attach = np.zeros_like(own)
+            x, y = start
+            if 0 <= x < size and 0 <= y < size:
+                attach[x, y] = not occupied[x, y]
+        else:
+            diagonal = np.zeros_like(own)
+            diagonal[1:, 1:] |= own[:-1, :-1]
+            diagonal[1:, :-1] |= own[:-1, 1:]
+            diagonal[:-1, 1:] |= own[1:, :-1]
+            diagonal[:-1, :-1] |= own[1:, 1:]
+            attach = diagonal & ~forbidden
+
+        # Squares beyond the bottom/right edge are forbidden (anchors are never negative)
+        padded_forbidden = np.ones((size + self.k - 1, size + self.k - 1), dtype=np.float32)
+        padded_forbidden[:size, :size] = forbidden
+        padded_attach = np.zeros((size + self.k - 1, size + self.k - 1), dtype=np.float32)
+        padded_attach[:size, :size] = attach
+
+        # shifted[dx * k + dy, anchor] = map value at anchor + (dx, dy)
+        shifted_forbidden = sliding_window_view(padded_forbidden, (size, size)).reshape(self.k * self.k, size * size)
+        shifted_attach = sliding_window_view(padded_attach, (size, size)).reshape(self.k * self.k, size * size)
+
+        blocked = self.cell_masks @ shifted_forbidden
+        attached = self.cell_masks @ shifted_attach
+        return ((blocked == 0) & (attached > 0)).sum(axis=1)
+
+    def count(self, own, occupied, first_move, start, piece_ids):
+        """Legal placements of the pieces `piece_ids` (a piece may appear once per copy held)."""
+        per_piece = self.piece_orientations @ self.placements_per_orientation(own, occupied, first_move, start)
+        return int(sum(per_piece[piece_id] for piece_id in piece_ids))
+
+    def count_after_move(self, game, board, player, piece, position, pieces):
+        """Legal placements of `player`'s remaining `pieces` after placing `piece` at `position`."""
+        own, occupied = self.board_arrays(game, board, player)
+        start_x, start_y = position
+        for dx, dy in piece:
+            own[start_x + dx, start_y + dy] = True
+            occupied[start_x + dx, start_y + dy] = True
+        piece_ids = [self.catalogue.piece_id(p) for p in pieces[player]]
+        return self.count(own, occupied, False, game.start_positions[player], piece_ids)
+
+
+def verify_against_python(games=3, seed=0):
+    """
+    Check that the vectorized counts equal the pure Python evaluator for
+    every candidate move along a few random games.
+    Returns the number of moves compared.
+    """
+    import io
+    import random
+    from contextlib import redirect_stdout
+
+    from game import BlokusDuoAI
+
+    random.seed(seed)
+    compared = 0
+    for _ in range(games):
+        game = BlokusDuoAI()
+        evaluator = MobilityEvaluator(game)
+        skip_count = 0
+        while skip_count < 2:
+            player = game.current_player
+            moves = game.get_all_moves(player, game.board, game.pieces, game.placed_pieces, game.frontier)
+            for piece_index, pos, ro_piece in moves[::7]:
+                pieces_copy = {p: game.pieces[p][:] for p in game.pieces}
+                pieces_copy[player].pop(piece_index)
+                placed_pieces_copy = {p: game.placed_pieces[p][:] for p in game.placed_pieces}
+                placed_pieces_copy[player].append(ro_piece)
+                expected = game.evaluate_board_after_move(player, ro_piece, pos, pieces_copy, placed_pieces_copy,
+                                                          game.copy_frontier(game.frontier), vectorized=False)
+                actual = evaluator.count_after_move(game, game.board, player, ro_piece, pos, pieces_copy)
+                if expected != actual:
+                    raise AssertionError(f"Mismatch for {player} {ro_piece} at {pos}: python={expected} numpy={actual}")
+                compared += 1
+            if moves:
+                piece_index, position, rotated_piece = random.choice(moves)
+                with redirect_stdout(io.StringIO()):
+                    game.place_piece(player, piece_index, rotated_piece, position)
+                skip_count = 0
+            else:
+                skip_count += 1
+            game.switch_player()
+    return compared
+
+
+if __name__ == "__main__":
+    compared = verify_against_python()
+    print(f"Vectorized mobility matches the Python evaluator on {compared} moves.")
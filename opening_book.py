@@ -0,0 +1,158 @@
+import argparse
+import io
+import mmap
+import os
+import struct
+import time
+from contextlib import redirect_stdout
+
+from symmetry import transpose_placement
+
+MAGIC = b"BLKB"
+VERSION = 2  # 2: positions keyed by the smaller hash of a position and its mirror image
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+
+# Header: magic, version, board size, full piece set (0/1), plies covered, number of entries
+HEADER = struct.Struct("<4sBBBBI")
+# Entry: position key (Zobrist hash with the side to move), piece ID, orientation ID, anchor x, anchor y
+ENTRY = struct.Struct("<QBBBB")
+
+
+class OpeningBook:
+    """
+    Read-only opening book: position key -> best move.
+
+    The entries are sorted by key in a memory-mapped file, so opening a
+    book reads only its header and a lookup is a binary search touching a
+    few pages.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.board_size, full_pieces, self.plies, self.size = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an opening book")
+        self.full_pieces = bool(full_pieces)
+
+    def matches(self, game):
+        """True if the book was built for the game's board size and piece set."""
+        return self.board_size == game.board_size and self.full_pieces == game.full_pieces
+
+    def entry(self, index):
+        return ENTRY.unpack_from(self.data, HEADER.size + index * ENTRY.size)
+
+    def lookup(self, key):
+        """(piece ID, orientation ID, position) stored for `key`, or None."""
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            entry_key, piece_id, orientation_id, x, y = self.entry(middle)
+            if entry_key < key:
+                low = middle + 1
+            elif entry_key > key:
+                high = middle
+            else:
+                return piece_id, orientation_id, (x, y)
+        return None
+
+
+_BOOKS = {}
+
+
+def get_book(path=BOOK_FILE):
+    """The opening book at `path`, opened on first use; None if there is no book file."""
+    if path not in _BOOKS:
+        _BOOKS[path] = OpeningBook(path) if os.path.exists(path) else None
+    return _BOOKS[path]
+
+
+def write_book(path, entries, board_size, full_pieces, plies):
+    """Write {key: (piece ID, orientation ID, position)} as a book file."""
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, board_size, int(full_pieces), plies, len(entries)))
+        for key in sorted(entries):
+            piece_id, orientation_id, (x, y) = entries[key]
+            f.write(ENTRY.pack(key, piece_id, orientation_id, x, y))
+    _BOOKS.pop(path, None)
+
+
+def ranked_moves(game, player):
+    """The player's moves, best first by the heuristic AI's mobility score."""
+    scored = []
+    index = game.get_placement_index()
+    for piece_index, pos, ro_piece in game.get_all_moves(player, game.board, game.pieces, game.placed_pieces,
+                                                          game.frontier):
+        piece_id = game.catalogue.piece_id(game.pieces[player][piece_index])
+        score = index.mobility_after(player, piece_id, ro_piece, pos)
+        scored.append((score, (piece_index, pos, ro_piece)))
+    scored.sort(key=lambda item: -item[0])
+    return [move for _, move in scored]
+
+
+def generate_book(path=BOOK_FILE, plies=4, width=6, ai="heuristic", depth=1, board_size=14, full_pieces=True):
+    """
+    Build an opening book for the first `plies` plies. Every position gets
+    the move chosen by `ai` ("heuristic", or "minimax" searched to `depth`);
+    the tree is expanded along that move and the `width` best other moves
+    by mobility, so the book also covers sensible replies of an opponent
+    that plays differently. Returns the number of positions stored.
+    """
+    from game import BlokusDuoAI
+
+    game = BlokusDuoAI(board_size, full_pieces, backend="bitboard", verbose=False, use_book=False)
+    entries = {}
+
+    def visit(ply):
+        player = game.current_player
+        key = game.position_key(player)
+        if key in entries:  # Transposition: reached before by another move order
+            return
+        if ai == "minimax":
+            best = game.minimax_ai(player, depth)
+        else:
+            best = game.heuristic_ai(player)
+        if best is None:
+            return
+        piece_index, position, cells = best
+        if game.position_mirrored():  # Store the move for the position the key belongs to
+            cells, position = transpose_placement(cells, position)
+        piece_id = game.catalogue.piece_id(game.pieces[player][piece_index])
+        entries[key] = (piece_id, game.catalogue.orientation_id(piece_id, cells), position)
+        if ply + 1 >= plies:
+            return
+
+        candidates = [best] + [move for move in ranked_moves(game, player)[:width] if move != best][:width - 1]
+        for piece_index, position, cells in candidates:
+            saved = game.game_state()
+            game.place_piece(player, piece_index, cells, position)
+            game.switch_player()
+            visit(ply + 1)
+            game.load_state(saved)
+
+    with redirect_stdout(io.StringIO()):
+        visit(0)
+    write_book(path, entries, board_size, full_pieces, plies)
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the Blokus Duo opening book")
+    parser.add_argument("--output", default=BOOK_FILE)
+    parser.add_argument("--plies", type=int, default=4, help="plies from the empty board covered by the book")
+    parser.add_argument("--width", type=int, default=6, help="moves expanded per position")
+    parser.add_argument("--ai", choices=["heuristic", "minimax"], default="heuristic")
+    parser.add_argument("--depth", type=int, default=1, help="minimax depth")
+    parser.add_argument("--board-size", type=int, default=14)
+    parser.add_argument("--small-pieces", action="store_true", help="use the small piece set")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = generate_book(args.output, args.plies, args.width, args.ai, args.depth, args.board_size,
+                          not args.small_pieces)
+    print(f"{count} positions written to {args.output} ({os.path.getsize(args.output)} bytes) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,52 @@
+import argparse
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+from matplotlib.animation import FFMpegWriter, FuncAnimation, PillowWriter
+from matplotlib.colors import ListedColormap
 import matplotlib.patches as patches
 
+from game_record import read_games
+
+# Cell value -> colour index of the fast renderer
+CELL_VALUES = {"X": 1, "O": 2}
+CELL_COLORS = ListedColormap(["white", "lightblue", "lightcoral"])
 
-def load_board_states(file_path):
-    """Load board states from a text file."""
+
+def iter_board_states(file_path, game_index=-1):
+    """
+    Yield board states one at a time from a game record file (.blkr, the
+    game at `game_index`, by default the last one) or from a board.txt dump.
+    """
+    if file_path.endswith(".blkr"):
+        if game_index < 0:
+            # Only the moves of the last -game_index games are kept
+            recorded = deque(read_games(file_path), maxlen=-game_index)[0]
+        else:
+            recorded = next(itertools.islice(read_games(file_path), game_index, None))
+        for board in recorded.boards():
+            yield [['.' if cell is None else cell for cell in row] for row in board]
+        return
     with open(file_path, 'r') as f:
-        content = f.read().strip()
-    raw_states = content.split('\n\n')  # Separate rounds by double newline
-    board_states = []
-    for raw_state in raw_states:
-        board = [row.split() for row in raw_state.split('\n')]
-        board_states.append(board)
-    return board_states
+        board = []
+        for line in f:
+            row = line.split()
+            if row:
+                board.append(row)
+            elif board:  # Rounds are separated by a blank line
+                yield board
+                board = []
+        if board:
+            yield board
+
+
+def load_board_states(file_path, game_index=-1):
+    """Load all board states of a game into a list (see iter_board_states)."""
+    return list(iter_board_states(file_path, game_index))
 
 
 def create_animation(board_states, output_file=None):
@@ -72,10 +106,99 @@ def create_animation(board_states, output_file=None):
     else:
         plt.show()
 
-if __name__ == "__main__":
 
-    # Load board states
-    board_states = load_board_states("board.txt")
+def board_array(board):
+    """Board rows of "X"/"O"/"." -> array of colour indices."""
+    return np.array([[CELL_VALUES.get(cell, 0) for cell in row] for row in board], dtype=np.uint8)
+
 
-    # Create and display the animation
-    create_animation(board_states, output_file="blokus_animation.gif")
\ No newline at end of file
+def setup_figure(size):
+    """Draw the static parts once: an image of the cells, the grid and the round label."""
+    fig, ax = plt.subplots(figsize=(7, 7))
+    ax.axis('off')
+    image = ax.imshow(np.zeros((size, size), dtype=np.uint8), cmap=CELL_COLORS, vmin=0, vmax=2,
+                      interpolation="nearest")
+    ax.hlines(np.arange(size + 1) - 0.5, -0.5, size - 0.5, color='black', linewidth=1)
+    ax.vlines(np.arange(size + 1) - 0.5, -0.5, size - 0.5, color='black', linewidth=1)
+    # The label sits inside the axes, above the grid, so that blitting redraws it
+    ax.set_ylim(size - 0.5, -1.5)
+    label = ax.text((size - 1) / 2, -1, "", ha="center", va="center", fontsize=16)
+    return fig, image, label
+
+
+def create_fast_animation(board_states, output_file=None, fps=1):
+    """
+    Animate an iterable of board states (e.g. iter_board_states) without
+    rebuilding the figure: every frame only replaces the image data and the
+    round label. Frames are consumed one at a time, so a generator is
+    never read into memory. Saves a .gif or .mp4 if `output_file` is given.
+    """
+    board_states = iter(board_states)
+    first = board_array(next(board_states))
+    fig, image, label = setup_figure(len(first))
+    frames = itertools.chain([first], (board_array(board) for board in board_states))
+
+    if output_file:
+        writer = PillowWriter(fps=fps) if output_file.endswith(".gif") else FFMpegWriter(fps=fps)
+        with writer.saving(fig, output_file, dpi=fig.dpi):
+            for frame, cells in enumerate(frames):
+                image.set_data(cells)
+                label.set_text(f"Round {frame + 1}")
+                writer.grab_frame()
+        plt.close(fig)
+        return output_file
+
+    def update(frame):
+        number, cells = frame
+        image.set_data(cells)
+        label.set_text(f"Round {number + 1}")
+        return image, label
+
+    ani = FuncAnimation(fig, update, frames=enumerate(frames), interval=1000 // fps, blit=True,
+                        cache_frame_data=False)
+    plt.show()
+    return ani
+
+
+def render_file(task):
+    """Worker task: render the last game of one file. Returns the output file."""
+    file_path, output_file, fps = task
+    plt.switch_backend("Agg")
+    return create_fast_animation(iter_board_states(file_path), output_file, fps)
+
+
+def render_files(file_paths, output_dir=".", extension="gif", fps=1, workers=None):
+    """Render many game files to GIF/MP4 in parallel worker processes."""
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = []
+    for file_path in file_paths:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        tasks.append((file_path, os.path.join(output_dir, f"{name}.{extension}"), fps))
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        return list(executor.map(render_file, tasks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Animate Blokus games from game record files or board.txt")
+    parser.add_argument("files", nargs="*", default=["games.blkr"])
+    parser.add_argument("--output", default="blokus_animation.gif",
+                        help="output file when rendering a single file (.gif or .mp4)")
+    parser.add_argument("--output-dir", default=".", help="output directory when rendering several files")
+    parser.add_argument("--format", choices=["gif", "mp4"], default="gif", help="format when rendering several files")
+    parser.add_argument("--fps", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for several files")
+    parser.add_argument("--slow", action="store_true", help="use the original patch-per-cell renderer")
+    args = parser.parse_args()
+
+    if len(args.files) > 1:
+        for output_file in render_files(args.files, args.output_dir, args.format, args.fps, args.workers):
+            print(f"Animation saved as {output_file}")
+    elif args.slow:
+        create_animation(load_board_states(args.files[0]), output_file=args.output)
+    else:
+        create_fast_animation(iter_board_states(args.files[0]), output_file=args.output, fps=args.fps)
+        print(f"Animation saved as {args.output}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,169 @@
+import itertools
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from search_state import SearchState
+from symmetry import unique_moves
+
+# Set in each worker process by _init_worker
+_worker_game = None
+_shared_bound = None
+_worker_search = None  # Number of the root search the worker's transposition table is aged for
+
+
+def _init_worker(config, shared_bound):
+    global _worker_game, _shared_bound
+    from game import BlokusDuoAI
+
+    _worker_game = BlokusDuoAI(**config)
+    _shared_bound = shared_bound
+
+
+def _search_root_move(search, player, depth, position, move):
+    """
+    Worker task: search one root move of root search number `search`. The
+    window comes from the best root score found so far by any worker, and a
+    better score is broadcast back. Returns (score, bound_used, nodes).
+    """
+    global _worker_search
+    game = _worker_game
+    if search != _worker_search:
+        # Age the table once per root search, like minimax_ai does
+        game.transposition_table.new_search()
+        _worker_search = search
+    game.nodes_searched = 0
+    game.load_state(position)
+    state = SearchState(game)
+    maximizing_player = player == game.maximizing_player
+
+    bound = _shared_bound.value
+    alpha, beta = (bound, math.inf) if maximizing_player else (-math.inf, bound)
+    piece_index, pos, piece = move
+    score = game.simulate_and_minimax(player, piece_index, piece, pos, depth, alpha, beta, maximizing_player, state)
+
+    with _shared_bound.get_lock():
+        if (score > _shared_bound.value) if maximizing_player else (score < _shared_bound.value):
+            _shared_bound.value = score
+    return score, bound, game.nodes_searched
+
+
+class ParallelSearcher:
+    """
+    Root-split minimax over a pool of worker processes.
+
+    Young brothers wait: the first root move is searched in this process to
+    get a bound, then the remaining root moves are spread over the workers.
+    Workers share the best root score through a multiprocessing.Value, read
+    it when they start a root move and update it when they finish one, so
+    later root moves are searched with a tighter window.
+    """
+
+    def __init__(self, game, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.shared_bound = multiprocessing.Value("d", 0.0)
+        self.searches = itertools.count(1)
+        # The workers search with the same settings as the game itself
+        config = {
+            "board_size": game.board_size,
+            "full_pieces": game.full_pieces,
+            "backend": game.backend,
+            "tt_memory_mb": game.tt_memory_mb,
+            "tt_replacement": game.transposition_table.replacement,
+            "verbose": game.verbose,
+            "collect_stats": game.collect_stats,
+            "use_book": game.use_book,
+            "endgame_moves": game.endgame_moves,
+            "endgame_pieces": game.endgame_pieces,
+            "endgame_time_ms": game.endgame_time_ms,
+        }
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(config, self.shared_bound)
+        )
+
+    def search(self, game, player, depth):
+        """
+        Return (best_move, best_score) for `player` in the game's current
+        position. game.nodes_searched is increased by the nodes searched in
+        this process and in the workers.
+        """
+        state = SearchState(game)
+        moves = state.moves(player)
+        if not moves:
+            return None, None
+        if state.self_symmetric():
+            moves = unique_moves(moves)
+        maximizing_player = player == game.maximizing_player
+
+        # Eldest brother first, in this process
+        piece_index, pos, piece = moves[0]
+        game.transposition_table.new_search()
+        eldest_score = game.simulate_and_minimax(player, piece_index, piece, pos, depth, -math.inf, math.inf,
+                                                 maximizing_player, state)
+        self.shared_bound.value = eldest_score
+
+        position = game.game_state()
+        search = next(self.searches)
+        futures = [self.executor.submit(_search_root_move, search, player, depth, position, move)
+                   for move in moves[1:]]
+
+        # A score that did not beat the window it was searched with is only a
+        # bound, so it never replaces a move whose score was established.
+        best_move, best_score = moves[0], eldest_score
+        for move, future in zip(moves[1:], futures):
+            score, bound, nodes = future.result()
+            game.nodes_searched += nodes
+            if maximizing_player and score > bound and score > best_score:
+                best_move, best_score = move, score
+            elif not maximizing_player and score < bound and score < best_score:
+                best_move, best_score = move, score
+        return best_move, best_score
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def measure_speedup(worker_counts=(1, 2, 4, 8), depth=2, plies=8, seed=0, backend="bitboard"):
+    """
+    Time one parallel root search per worker count against the sequential
+    minimax root search on the same position and print the speedup.
+    """
+    from bench_search import play_random_plies
+    from game import BlokusDuoAI
+
+    game = BlokusDuoAI(backend=backend)
+    play_random_plies(game, plies, seed)
+    player = game.current_player
+
+    start = time.perf_counter()
+    game.transposition_table.new_search()
+    sequential_move, sequential_score = game.minimax_root(player, depth, SearchState(game))
+    sequential = time.perf_counter() - start
+    print(f"Position after {plies} plies, depth {depth}, {os.cpu_count()} CPUs")
+    print(f"  sequential: {sequential:.2f}s")
+
+    results = {}
+    for workers in worker_counts:
+        game.transposition_table.clear()
+        searcher = ParallelSearcher(game, workers)
+        # Start the worker processes before timing
+        list(searcher.executor.map(abs, range(workers)))
+        start = time.perf_counter()
+        move, score = searcher.search(game, player, depth)
+        elapsed = time.perf_counter() - start
+        searcher.close()
+        results[workers] = elapsed
+        if move == sequential_move:
+            same = "same move"
+        elif score == sequential_score:
+            same = "different move, same score"
+        else:
+            same = f"DIFFERENT SCORE {score} vs {sequential_score}"
+        print(f"  {workers:3d} workers: {elapsed:.2f}s  speedup {sequential / elapsed:.2f}x  ({same})")
+    return results
+
+
+if __name__ == "__main__":
+    measure_speedup()
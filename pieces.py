@@ -0,0 +1,109 @@
+def normalize(cells):
+    """Shift cells so the bounding box starts at the origin, in a canonical order."""
+    min_x = min(x for x, y in cells)
+    min_y = min(y for x, y in cells)
+    return tuple(sorted((x - min_x, y - min_y) for x, y in cells))
+
+
+def transforms(piece):
+    """Yield the piece under the 8 rotations and reflections of the square."""
+    current = list(piece)
+    for _ in range(4):  # 0°, 90°, 180°, 270°
+        # (x, y) -> (y, -x)
+        current = [(y, -x) for x, y in current]
+        yield current
+        # Mirror image: (x, y) -> (x, -y)
+        yield [(x, -y) for x, y in current]
+
+
+class Orientation:
+    """One placed shape of a piece, normalized to the origin."""
+
+    __slots__ = ("id", "piece_id", "cells", "size", "height", "width", "corner_cells")
+
+    def __init__(self, orientation_id, piece_id, cells):
+        self.id = orientation_id
+        self.piece_id = piece_id
+        self.cells = cells
+        self.size = len(cells)
+        self.height = max(x for x, y in cells) + 1
+        self.width = max(y for x, y in cells) + 1
+
+        # Cells that can sit on a diagonal attachment point: they have a diagonal
+        # neighbour that is neither part of the piece nor edge-adjacent to it.
+        cell_set = set(cells)
+        edge_halo = set()
+        for x, y in cells:
+            for n in [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]:
+                if n not in cell_set:
+                    edge_halo.add(n)
+        corner_cells = []
+        for x, y in cells:
+            for n in [(x - 1, y - 1), (x - 1, y + 1), (x + 1, y - 1), (x + 1, y + 1)]:
+                if n not in cell_set and n not in edge_halo:
+                    corner_cells.append((x, y))
+                    break
+        self.corner_cells = tuple(corner_cells)
+
+    def __repr__(self):
+        return f"Orientation(id={self.id}, piece_id={self.piece_id}, cells={self.cells})"
+
+
+class PieceCatalogue:
+    """
+    All pieces of a piece set with stable IDs and their deduplicated
+    rotations and reflections (91 orientations for the standard 21 pieces).
+    """
+
+    def __init__(self, pieces):
+        self.pieces = [normalize(piece) for piece in pieces]
+        self.orientations = []
+        self.by_piece = []
+        self._ids = {}
+        self._orientation_ids = {}  # (piece ID, cells) -> orientation ID
+        for piece_id, piece in enumerate(pieces):
+            self._ids[tuple(piece)] = piece_id
+        for piece_id, piece in enumerate(self.pieces):
+            self._ids.setdefault(piece, piece_id)
+            seen = set()
+            piece_orientations = []
+            for transformed in transforms(piece):
+                cells = normalize(transformed)
+                if cells in seen:
+                    continue
+                seen.add(cells)
+                orientation = Orientation(len(self.orientations), piece_id, cells)
+                self.orientations.append(orientation)
+                piece_orientations.append(orientation)
+            self.by_piece.append(piece_orientations)
+            for orientation in piece_orientations:
+                self._ids.setdefault(orientation.cells, piece_id)
+                self._orientation_ids[(piece_id, orientation.cells)] = orientation.id
+
+    def piece_id(self, piece):
+        """Stable ID of a piece given any of its orientations."""
+        piece_id = self._ids.get(tuple(piece))
+        if piece_id is None:
+            piece_id = self._ids[normalize(piece)]
+        return piece_id
+
+    def orientation_id(self, piece_id, cells):
+        """ID of the orientation of piece `piece_id` with the given (normalized) cells."""
+        return self._orientation_ids[(piece_id, tuple(cells))]
+
+    def orientations_of(self, piece):
+        """All orientations of a piece given any of its orientations."""
+        return self.by_piece[self.piece_id(piece)]
+
+
+_CATALOGUES = {}
+
+
+def get_catalogue(pieces):
+    """Return the catalogue for a piece set, building it only once."""
+    key = tuple(normalize(piece) for piece in pieces)
+    catalogue = _CATALOGUES.get(key)
+    if catalogue is None:
+        catalogue = PieceCatalogue(pieces)
+        _CATALOGUES[key] = catalogue
+    return catalogue
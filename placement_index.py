@@ -0,0 +1,235 @@
+class PlacementUniverse:
+    """
+    Every in-bounds placement (orientation, anchor) of a piece catalogue on
+    a board, numbered so that a set of placements is one int with a bit per
+    placement. Shared by all games with the same catalogue and board size.
+
+    covering[cell] has the bits of the placements covering that cell (cells
+    are numbered x * board_size + y), piece_masks[piece_id] those of the
+    piece's orientations.
+    """
+
+    def __init__(self, catalogue, board_size):
+        self.catalogue = catalogue
+        self.board_size = board_size
+        self.placements = []  # Placement number -> (orientation ID, anchor)
+        self.covering = [0] * (board_size * board_size)
+        self.piece_masks = [0] * len(catalogue.pieces)
+        for orientation in catalogue.orientations:
+            for x in range(board_size - orientation.height + 1):
+                for y in range(board_size - orientation.width + 1):
+                    bit = 1 << len(self.placements)
+                    self.placements.append((orientation.id, (x, y)))
+                    self.piece_masks[orientation.piece_id] |= bit
+                    for dx, dy in orientation.cells:
+                        self.covering[(x + dx) * board_size + y + dy] |= bit
+        self.all = (1 << len(self.placements)) - 1
+
+        def neighbours(x, y, offsets):
+            return tuple((x + dx) * board_size + y + dy for dx, dy in offsets
+                         if 0 <= x + dx < board_size and 0 <= y + dy < board_size)
+
+        self.edge_neighbours = []
+        self.diagonal_neighbours = []
+        for x in range(board_size):
+            for y in range(board_size):
+                self.edge_neighbours.append(neighbours(x, y, [(-1, 0), (1, 0), (0, -1), (0, 1)]))
+                self.diagonal_neighbours.append(neighbours(x, y, [(-1, -1), (-1, 1), (1, -1), (1, 1)]))
+
+    def covering_any(self, cells):
+        """Bits of the placements covering at least one of `cells`."""
+        mask = 0
+        covering = self.covering
+        for cell in cells:
+            mask |= covering[cell]
+        return mask
+
+
+_UNIVERSES = {}
+
+
+def get_universe(catalogue, board_size):
+    """Return the placement universe of a catalogue and board size, building it only once."""
+    key = (id(catalogue), board_size)
+    universe = _UNIVERSES.get(key)
+    if universe is None:
+        universe = PlacementUniverse(catalogue, board_size)
+        _UNIVERSES[key] = universe
+    return universe
+
+
+class PlacementIndex:
+    """
+    Incremental index of each player's legal placements.
+
+    For every player it keeps the placements that still fit (on empty cells
+    and not edge-adjacent to the player's squares), the player's attachment
+    cells and the legal placements: those that fit, use a piece the player
+    still holds and cover an attachment cell. Placements only stop fitting
+    as the board fills up, so a move just removes the placements covering
+    its squares (and, for the mover, their edge neighbours) and adds the
+    ones covering the new attachment cells. All sets are ints with one bit
+    per placement (see PlacementUniverse), so each step is a few int
+    operations instead of a scan of the board.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.universe = get_universe(game.catalogue, game.board_size)
+        size = game.board_size
+        universe = self.universe
+        self.occupied = set()
+        self.own = {player: set() for player in game.players}
+        for x, row in enumerate(game.board_rows()):
+            for y, marker in enumerate(row):
+                if marker is not None:
+                    self.occupied.add(x * size + y)
+                    self.own["Player 1" if marker == "X" else "Player 2"].add(x * size + y)
+
+        self.fits = {}
+        self.attach = {}
+        self.held = {}
+        self.legal = {}
+        for player in game.players:
+            own = self.own[player]
+            blocked = set(self.occupied)
+            for cell in own:
+                blocked.update(universe.edge_neighbours[cell])
+            if game.placed_pieces[player]:
+                attach = {cell for own_cell in own for cell in universe.diagonal_neighbours[own_cell]
+                          if cell not in blocked}
+            else:
+                start_x, start_y = game.start_positions[player]
+                attach = set()
+                if 0 <= start_x < size and 0 <= start_y < size:
+                    attach = {start_x * size + start_y} - self.occupied
+            self.fits[player] = universe.all & ~universe.covering_any(blocked)
+            self.attach[player] = attach
+            held = 0
+            for piece in game.pieces[player]:
+                held |= universe.piece_masks[game.catalogue.piece_id(piece)]
+            self.held[player] = held
+            self.legal[player] = self.fits[player] & held & universe.covering_any(attach)
+
+    def other(self, player):
+        players = self.game.players
+        return players[1] if player == players[0] else players[0]
+
+    def placements(self, player):
+        """The player's legal placements as (orientation ID, anchor) pairs."""
+        legal = self.legal[player]
+        placements = self.universe.placements
+        result = []
+        while legal:
+            low = legal & -legal
+            result.append(placements[low.bit_length() - 1])
+            legal ^= low
+        return result
+
+    def mobility(self, player):
+        """Number of legal placements of `player`."""
+        return self.legal[player].bit_count()
+
+    def move_cells(self, player, piece, position):
+        """(squares, squares plus their edge neighbours, new attachment cells) of a move by `player`."""
+        universe = self.universe
+        size = self.game.board_size
+        start_x, start_y = position
+        cells = [(start_x + dx) * size + start_y + dy for dx, dy in piece]
+        blocked = set(cells)
+        for cell in cells:
+            blocked.update(universe.edge_neighbours[cell])
+        own = self.own[player]
+        attach = self.attach[player]
+        added = set()
+        for cell in cells:
+            for corner in universe.diagonal_neighbours[cell]:
+                if corner in blocked or corner in self.occupied or corner in attach:
+                    continue
+                if any(n in own for n in universe.edge_neighbours[corner]):
+                    continue
+                added.add(corner)
+        return cells, blocked, added
+
+    def mobility_after(self, player, piece_id, piece, position):
+        """
+        Number of legal placements `player` has after placing `piece` (an
+        orientation of piece `piece_id`) at `position`. The ID is passed
+        because the piece set has pieces of the same shape.
+        """
+        universe = self.universe
+        cells, blocked, added = self.move_cells(player, piece, position)
+        kept = ~universe.covering_any(blocked)
+        held = self.held[player] & ~universe.piece_masks[piece_id]
+        legal = self.legal[player] | (self.fits[player] & universe.covering_any(added))
+        return (legal & kept & held).bit_count()
+
+    def apply(self, player, piece_id, piece, position):
+        """Update the index for `player` placing `piece` (an orientation of piece `piece_id`) at `position`."""
+        universe = self.universe
+        cells, blocked, added = self.move_cells(player, piece, position)
+        other = self.other(player)
+        kept = ~universe.covering_any(blocked)
+        kept_other = ~universe.covering_any(cells)
+        self.fits[player] &= kept
+        self.fits[other] &= kept_other
+        self.legal[other] &= kept_other
+        self.held[player] &= ~universe.piece_masks[piece_id]
+        self.attach[player] = (self.attach[player] - blocked) | added
+        self.attach[other].difference_update(cells)
+        self.legal[player] = (self.legal[player] | universe.covering_any(added)) & self.fits[player] & self.held[player]
+        self.occupied.update(cells)
+        self.own[player].update(cells)
+
+
+def verify_against_python(games=3, seed=0):
+    """
+    Play random games keeping an index up to date and check its counts
+    against the pure Python evaluator: the current mobility of both players
+    and the mobility after every few candidate moves. Returns the number of
+    counts compared.
+    """
+    import random
+
+    from game import BlokusDuoAI
+
+    rng = random.Random(seed)
+    compared = 0
+    for _ in range(games):
+        game = BlokusDuoAI(verbose=False, use_book=False)
+        index = PlacementIndex(game)
+        skip_count = 0
+        while skip_count < 2:
+            player = game.current_player
+            for side in game.players:
+                expected = len(game.get_all_moves(side, game.board, game.pieces, game.placed_pieces, game.frontier))
+                if index.mobility(side) != expected:
+                    raise AssertionError(f"Mobility of {side}: index={index.mobility(side)} python={expected}")
+                compared += 1
+            moves = game.get_all_moves(player, game.board, game.pieces, game.placed_pieces, game.frontier)
+            for piece_index, pos, ro_piece in moves[::7]:
+                pieces_copy = {p: game.pieces[p][:] for p in game.pieces}
+                pieces_copy[player].pop(piece_index)
+                placed_pieces_copy = {p: game.placed_pieces[p][:] for p in game.placed_pieces}
+                placed_pieces_copy[player].append(ro_piece)
+                expected = game.evaluate_board_after_move(player, ro_piece, pos, pieces_copy, placed_pieces_copy,
+                                                          game.copy_frontier(game.frontier), vectorized=False)
+                actual = index.mobility_after(player, game.catalogue.piece_id(game.pieces[player][piece_index]),
+                                              ro_piece, pos)
+                if expected != actual:
+                    raise AssertionError(f"Mismatch for {player} {ro_piece} at {pos}: python={expected} index={actual}")
+                compared += 1
+            if moves:
+                piece_index, position, rotated_piece = rng.choice(moves)
+                index.apply(player, game.catalogue.piece_id(game.pieces[player][piece_index]), rotated_piece, position)
+                game.place_piece(player, piece_index, rotated_piece, position)
+                skip_count = 0
+            else:
+                skip_count += 1
+            game.switch_player()
+    return compared
+
+
+if __name__ == "__main__":
+    compared = verify_against_python()
+    print(f"Placement index matches the Python evaluator on {compared} counts.")
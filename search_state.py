@@ -0,0 +1,92 @@
+from symmetry import is_self_symmetric
+
+
+class SearchState:
+    """
+    Mutable game state shared by a whole search.
+
+    The search walks the tree by calling apply_move before visiting a child
+    and undo_move after it, instead of copying the board, piece lists and
+    frontier at every node. Each apply_move pushes one compact undo entry.
+    `hash` is the Zobrist hash of the board plus remaining pieces, kept up
+    to date incrementally (see transposition.py), and `mirror_hash` the
+    hash of the position mirrored in the main diagonal (see symmetry.py).
+    """
+
+    def __init__(self, game, board=None, pieces=None, placed_pieces=None, frontier=None):
+        self.game = game
+        board = game.board if board is None else board
+        pieces = game.pieces if pieces is None else pieces
+        placed_pieces = game.placed_pieces if placed_pieces is None else placed_pieces
+        frontier = game.frontier if frontier is None else frontier
+        self.board = game.copy_board(board)
+        self.pieces = {player: pieces[player][:] for player in pieces}
+        self.placed_pieces = {player: placed_pieces[player][:] for player in placed_pieces}
+        self.frontier = game.copy_frontier(frontier)
+        self.undo_stack = []
+        self.hash = game.zobrist.hash_position(game, self.board, self.pieces)
+        self.mirror_hash = game.zobrist.hash_position(game, self.board, self.pieces, mirrored=True)
+
+    def copy(self):
+        """Independent copy of the current position (the undo history is not copied)."""
+        return SearchState(self.game, self.board, self.pieces, self.placed_pieces, self.frontier)
+
+    def apply_move(self, player, piece_index, piece, position):
+        """Play a move in place and record how to take it back."""
+        game = self.game
+        game.mark_piece(self.board, player, piece, position)
+        base_piece = self.pieces[player].pop(piece_index)
+        self.placed_pieces[player].append(piece)
+        removed, added = game.update_frontier(self.frontier, self.board, player, piece, position)
+        piece_id = game.catalogue.piece_id(base_piece)
+        delta = game.zobrist.piece_delta(player, piece_id, piece, position)
+        mirror_delta = game.zobrist.piece_delta(player, piece_id, piece, position, mirrored=True)
+        self.hash ^= delta
+        self.mirror_hash ^= mirror_delta
+        self.undo_stack.append((player, piece_index, base_piece, piece, position, removed, added, delta, mirror_delta))
+
+    def undo_move(self):
+        """Take back the last applied move."""
+        player, piece_index, base_piece, piece, position, removed, added, delta, mirror_delta = self.undo_stack.pop()
+        self.hash ^= delta
+        self.mirror_hash ^= mirror_delta
+        own = self.frontier[player]
+        for cell in added:
+            own.discard(cell)
+        for frontier_player, cell in removed:
+            self.frontier[frontier_player].add(cell)
+        self.placed_pieces[player].pop()
+        self.pieces[player].insert(piece_index, base_piece)
+        self.game.unmark_piece(self.board, piece, position)
+
+    def key(self, player):
+        """
+        Transposition key of the current position with `player` to move.
+        With game.use_symmetry it is the same for both mirror images.
+        """
+        h = min(self.hash, self.mirror_hash) if self.game.use_symmetry else self.hash
+        return h ^ self.game.zobrist.side[player]
+
+    def mirrored(self):
+        """True if key() is the key of the mirror image, so stored moves must be mirrored."""
+        return self.game.use_symmetry and self.mirror_hash < self.hash
+
+    def self_symmetric(self):
+        """True if the position is its own mirror image (and symmetry is used)."""
+        return (self.game.use_symmetry and self.mirror_hash == self.hash
+                and is_self_symmetric(self.game, self.board))
+
+    def moves(self, player):
+        """All legal moves of `player` in the current position."""
+        return self.game.get_all_moves(player, self.board, self.pieces, self.placed_pieces, self.frontier)
+
+    def iter_moves(self, player):
+        """Legal moves of `player`, generated lazily in staged order (see BlokusDuoAI.iter_moves)."""
+        return self.game.iter_moves(player, self.board, self.pieces, self.placed_pieces, self.frontier)
+
+    def has_move(self, player):
+        """True if `player` has a legal move, without generating them all."""
+        return self.game.has_legal_move(player, self.board, self.pieces, self.placed_pieces, self.frontier)
+
+    def is_legal(self, player, move):
+        return self.game.is_legal_move(player, move, self.board, self.pieces, self.placed_pieces)
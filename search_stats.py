@@ -0,0 +1,110 @@
+import time
+
+
+class SearchStats:
+    """
+    Counters for one AI decision. Created by BlokusDuoAI.choose_move when
+    the game has collect_stats=True; the search only touches it through
+    `game.stats`, which is None otherwise, so disabled stats cost one
+    `is None` test per node.
+
+    Per-ply counters are dicts keyed by the ply from the root (0 = the
+    root position, 1 = after one move, ...).
+    """
+
+    __slots__ = ("ai", "nodes", "leaf_evaluations", "cutoffs", "tt_cutoffs", "legality_checks",
+                 "moves_generated", "nodes_expanded", "move_gen_seconds", "eval_seconds", "wall_seconds",
+                 "root_depth", "depth_reached")
+
+    def __init__(self, ai):
+        self.ai = ai
+        self.nodes = 0
+        self.leaf_evaluations = 0
+        self.cutoffs = {}  # ply -> alpha-beta cutoffs
+        self.tt_cutoffs = 0
+        self.legality_checks = 0
+        self.moves_generated = {}  # ply -> moves generated at nodes of that ply
+        self.nodes_expanded = {}  # ply -> nodes of that ply whose moves were generated
+        self.move_gen_seconds = 0.0
+        self.eval_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.root_depth = 0  # Depth of the current minimax iteration, to turn depths into plies
+        self.depth_reached = 0
+
+    def generate_moves(self, state, player, ply):
+        """state.moves(player), timed and counted towards the branching factor."""
+        start = time.perf_counter()
+        moves = state.moves(player)
+        self.move_gen_seconds += time.perf_counter() - start
+        self.moves_generated[ply] = self.moves_generated.get(ply, 0) + len(moves)
+        self.nodes_expanded[ply] = self.nodes_expanded.get(ply, 0) + 1
+        return moves
+
+    def iter_moves(self, state, player, ply):
+        """
+        state.iter_moves(player), timing each step. Only the moves the
+        search actually takes count towards the branching factor.
+        """
+        self.nodes_expanded[ply] = self.nodes_expanded.get(ply, 0) + 1
+        moves = state.iter_moves(player)
+        while True:
+            start = time.perf_counter()
+            move = next(moves, None)
+            self.move_gen_seconds += time.perf_counter() - start
+            if move is None:
+                return
+            self.moves_generated[ply] = self.moves_generated.get(ply, 0) + 1
+            yield move
+
+    def has_move(self, state, player):
+        """state.has_move(player), timed."""
+        start = time.perf_counter()
+        found = state.has_move(player)
+        self.move_gen_seconds += time.perf_counter() - start
+        return found
+
+    def evaluate(self, game, board, pieces):
+        """game.static_evaluation, timed and counted as a leaf."""
+        start = time.perf_counter()
+        score = game.static_evaluation(board, pieces)
+        self.eval_seconds += time.perf_counter() - start
+        self.leaf_evaluations += 1
+        return score
+
+    def count_cutoff(self, ply):
+        self.cutoffs[ply] = self.cutoffs.get(ply, 0) + 1
+
+    def branching_factor(self):
+        """{ply: average number of moves at the expanded nodes of that ply}."""
+        return {ply: self.moves_generated[ply] / self.nodes_expanded[ply] for ply in sorted(self.nodes_expanded)}
+
+    def as_dict(self):
+        """JSON-serializable form (ply keys become strings)."""
+        return {
+            "ai": self.ai,
+            "nodes": self.nodes,
+            "leaf_evaluations": self.leaf_evaluations,
+            "cutoffs_by_ply": {str(ply): count for ply, count in sorted(self.cutoffs.items())},
+            "tt_cutoffs": self.tt_cutoffs,
+            "legality_checks": self.legality_checks,
+            "branching_factor": {str(ply): factor for ply, factor in self.branching_factor().items()},
+            "depth_reached": self.depth_reached,
+            "move_gen_seconds": self.move_gen_seconds,
+            "eval_seconds": self.eval_seconds,
+            "wall_seconds": self.wall_seconds,
+        }
+
+    def summary(self):
+        """One line for the game log."""
+        nodes_per_second = self.nodes / self.wall_seconds if self.wall_seconds > 0 else 0.0
+        text = (f"{self.ai}: {self.nodes} nodes, {self.leaf_evaluations} leaves, "
+                f"{self.legality_checks} legality checks in {self.wall_seconds:.3f}s ({nodes_per_second:.0f} nodes/s), "
+                f"move gen {self.move_gen_seconds:.3f}s, eval {self.eval_seconds:.3f}s")
+        if self.depth_reached:
+            text += f", depth {self.depth_reached}"
+        if self.cutoffs:
+            text += ", cutoffs " + " ".join(f"{ply}:{count}" for ply, count in sorted(self.cutoffs.items()))
+        branching = self.branching_factor()
+        if branching:
+            text += ", branching " + " ".join(f"{ply}:{factor:.1f}" for ply, factor in branching.items())
+        return text
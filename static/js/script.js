@@ -1,11 +1,29 @@
 const boardElement = document.getElementById('board');
 const statusElement = document.getElementById('status');
 
+// Last state received; later polls only ask for the turns played since its version
+let gameState = null;
+let stateTag = null;
+
 async function fetchBoard() {
     try {
-        const response = await fetch('/api/get_board');
-        const gameState = await response.json();
-        renderBoard(gameState.board);
+        const url = gameState === null ? '/api/get_board' : `/api/changes?since=${gameState.version}`;
+        const response = await fetch(url, { headers: stateTag ? { 'If-None-Match': stateTag } : {} });
+        if (response.status !== 304) { // 304: nothing changed since our version
+            stateTag = response.headers.get('ETag');
+            const update = await response.json();
+            if (gameState === null || update.full) {
+                gameState = update;
+                renderBoard(gameState.board);
+            } else {
+                applyChanges(update);
+            }
+        }
+        if (gameState.game_over) {
+            const scores = gameState.scores;
+            statusElement.textContent = `Game Over! Player 1: ${scores["Player 1"]}, Player 2: ${scores["Player 2"]}`;
+            return;
+        }
         statusElement.textContent = `Current Player: ${gameState.current_player}`;
 
         // If it's AI's turn, automatically make a move
@@ -17,6 +35,25 @@ async function fetchBoard() {
     }
 }
 
+function applyChanges(changes) {
+    // Patch the board cells and the remaining pieces with the new turns
+    const size = gameState.board.length;
+    changes.turns.forEach(turn => {
+        if (turn.pass) {
+            return;
+        }
+        turn.cells.forEach(([x, y]) => {
+            gameState.board[x][y] = turn.marker;
+            boardElement.children[x * size + y].className = `cell ${turn.marker}`;
+        });
+        gameState.pieces[turn.player].splice(turn.piece_index, 1);
+    });
+    gameState.version = changes.version;
+    gameState.current_player = changes.current_player;
+    gameState.scores = changes.scores;
+    gameState.game_over = changes.game_over;
+}
+
 function renderBoard(board) {
     boardElement.innerHTML = ''; // Clear the board
     board.forEach(row => {
@@ -40,7 +77,19 @@ async function makeMove(pieceIndex = null, position = null) {
             body: JSON.stringify(data),
         });
 
-        if (response.ok) {
+        if (response.status === 202) {
+            // The AI thinks in the background: wait for its job to finish
+            const { job_id } = await response.json();
+            statusElement.textContent = "AI is thinking...";
+            const job = await waitForJob(job_id);
+            if (job.status === "done" && job.result.status === "success") {
+                await fetchBoard();
+            } else if (job.status === "done") {
+                statusElement.textContent = job.result.message;
+            } else if (job.status === "failed") {
+                statusElement.textContent = job.message;
+            }
+        } else if (response.ok) {
             await fetchBoard(); // Update board after move
         } else {
             const error = await response.json();
@@ -51,6 +100,17 @@ async function makeMove(pieceIndex = null, position = null) {
     }
 }
 
+async function waitForJob(jobId) {
+    // Long-poll until the job is no longer queued or running
+    while (true) {
+        const response = await fetch(`/api/jobs/${jobId}?wait=25`);
+        const job = await response.json();
+        if (!response.ok || (job.status !== "queued" && job.status !== "running")) {
+            return job;
+        }
+    }
+}
+
 async function resetGame() {
     try {
         const response = await fetch('/api/reset', { method: 'POST' });
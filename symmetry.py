@@ -0,0 +1,82 @@
+from pieces import normalize
+
+# The Blokus Duo board is symmetric about its main diagonal: mirroring
+# (x, y) -> (y, x) keeps both start positions, (0, 0) and (13, 13), in
+# place. A position and its mirror image have the same value with mirrored
+# best moves, so the search stores them under one key (the smaller of the
+# two Zobrist hashes) and, in a position that is its own mirror image, only
+# searches one move of each mirror pair.
+
+
+def transpose_placement(cells, position):
+    """A placement mirrored in the main diagonal, as (normalized cells, anchor)."""
+    start_x, start_y = position
+    squares = [(start_y + dy, start_x + dx) for dx, dy in cells]
+    anchor = (min(x for x, y in squares), min(y for x, y in squares))
+    return normalize(squares), anchor
+
+
+def transpose_move(move):
+    """A move (piece_index, position, cells) mirrored in the main diagonal."""
+    piece_index, position, cells = move
+    cells, position = transpose_placement(cells, position)
+    return piece_index, position, cells
+
+
+def unique_moves(moves):
+    """The moves without the mirror image of an earlier one, for a position that is its own mirror image."""
+    kept = []
+    seen = set()
+    for move in moves:
+        if transpose_move(move) in seen:
+            continue
+        seen.add(move)
+        kept.append(move)
+    return kept
+
+
+def is_self_symmetric(game, board):
+    """True if `board` is its own mirror image in the main diagonal."""
+    rows = game.board_rows(board)
+    size = game.board_size
+    return all(rows[x][y] == rows[y][x] for x in range(size) for y in range(x + 1, size))
+
+
+def measure_node_reduction(depth=3):
+    """
+    Search opening positions with and without symmetry and print the nodes
+    searched. Checks that both searches find the same score. Returns
+    {position name: (nodes without, nodes with)}.
+    """
+    from game import BlokusDuoAI
+    from search_state import SearchState
+
+    openings = {
+        "empty board": [],
+        "after 1 (monomino)": [("Player 1", 0, (0, 0), ((0, 0),))],
+        "after 2 (monominoes)": [("Player 1", 0, (0, 0), ((0, 0),)), ("Player 2", 0, (13, 13), ((0, 0),))],
+    }
+    results = {}
+    for name, moves in openings.items():
+        nodes = []
+        scores = []
+        for use_symmetry in (False, True):
+            game = BlokusDuoAI(backend="bitboard", verbose=False, use_book=False, endgame_time_ms=0)
+            game.use_symmetry = use_symmetry
+            for player, piece_index, position, cells in moves:
+                game.place_piece(player, piece_index, cells, position)
+                game.switch_player()
+            game.nodes_searched = 0
+            _, score = game.minimax_root(game.current_player, depth, SearchState(game))
+            nodes.append(game.nodes_searched)
+            scores.append(score)
+        if scores[0] != scores[1]:
+            raise AssertionError(f"{name}: score {scores[1]} with symmetry, {scores[0]} without")
+        results[name] = tuple(nodes)
+        print(f"{name:22s} depth {depth}: {nodes[0]:7d} nodes without symmetry, {nodes[1]:7d} with "
+              f"({1 - nodes[1] / nodes[0]:.0%} fewer)")
+    return results
+
+
+if __name__ == "__main__":
+    measure_node_reduction()
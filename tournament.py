@@ -0,0 +1,192 @@
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game import BlokusDuoAI
+
+
+def parse_ai(spec):
+    """
+    Parse an AI spec into (name, keyword arguments):
+      random, heuristic
+      minimax:<depth>        e.g. minimax:2
+      minimax:<N>ms          iterative deepening with a time budget
+      mcts:<iterations>      e.g. mcts:200
+      mcts:<N>ms             MCTS with a time budget (and no iteration cap)
+
+    >>> parse_ai("minimax:500ms")
+    ('minimax', {'time_budget_ms': 500})
+    >>> parse_ai("mcts:5000ms")
+    ('mcts', {'iterations': None, 'time_budget_ms': 5000})
+    >>> parse_ai("mcts:200")
+    ('mcts', {'iterations': 200})
+    """
+    name, _, arg = spec.partition(":")
+    if name in ("random", "heuristic"):
+        if arg:
+            raise ValueError(f"{name} takes no argument: {spec}")
+        return name, {}
+    if name not in ("minimax", "mcts"):
+        raise ValueError(f"Unknown AI: {spec}")
+    if not arg:
+        return name, {}
+    if arg.endswith("ms"):
+        if name == "mcts":
+            # Otherwise mcts_ai's default iteration count would end the search first
+            return name, {"iterations": None, "time_budget_ms": int(arg[:-2])}
+        return name, {"time_budget_ms": int(arg[:-2])}
+    if name == "minimax":
+        return name, {"depth": int(arg)}
+    return name, {"iterations": int(arg)}
+
+
+def make_ai(game, spec, rng):
+    """Return a function player -> move for an AI spec."""
+    name, kwargs = parse_ai(spec)
+    if name == "mcts":
+        ai = game.mcts_ai
+        return lambda player: ai(player, seed=rng.randrange(2 ** 32), **kwargs)
+    ai = getattr(game, f"{name}_ai")
+    return lambda player: ai(player, **kwargs)
+
+
+def play_game(task):
+    """
+    Play one headless game (no printing, no board.txt).
+    Returns (spec of Player 1, spec of Player 2, Player 1 score, Player 2 score, plies).
+    """
+    spec1, spec2, seed, config = task
+    random.seed(seed)  # random_ai uses the module RNG
+    rng = random.Random(seed)
+    game = BlokusDuoAI(verbose=False, **config)
+    ais = {"Player 1": make_ai(game, spec1, rng), "Player 2": make_ai(game, spec2, rng)}
+
+    plies = 0
+    skip_count = 0
+    while skip_count < 2:
+        move = ais[game.current_player](game.current_player)
+        if move:
+            piece_index, position, rotated_piece = move
+            game.place_piece(game.current_player, piece_index, rotated_piece, position)
+            skip_count = 0
+            plies += 1
+        else:
+            skip_count += 1
+        game.switch_player()
+    game.close()
+    return spec1, spec2, game.calculate_score("Player 1"), game.calculate_score("Player 2"), plies
+
+
+def elo_ratings(results, specs, iterations=200):
+    """
+    Elo estimates from game results (Bradley-Terry fit by gradient steps),
+    centred on 1500. Every pair also gets one virtual draw so that a player
+    who won every game still gets a finite rating.
+    """
+    games = []  # (a, b, points of a)
+    for spec1, spec2, score1, score2, _ in results:
+        games.append((spec1, spec2, 1.0 if score1 < score2 else 0.5 if score1 == score2 else 0.0))
+    for a, b in itertools.combinations(specs, 2):
+        games.append((a, b, 0.5))
+
+    ratings = {spec: 0.0 for spec in specs}
+    counts = {spec: sum(1 for a, b, _ in games if spec in (a, b)) for spec in specs}
+    for _ in range(iterations):
+        gradient = {spec: 0.0 for spec in specs}
+        for a, b, points in games:
+            expected = 1 / (1 + 10 ** ((ratings[b] - ratings[a]) / 400))
+            gradient[a] += points - expected
+            gradient[b] -= points - expected
+        for spec in specs:
+            if counts[spec]:
+                ratings[spec] += 400 * gradient[spec] / counts[spec]
+        mean = sum(ratings.values()) / len(ratings)
+        ratings = {spec: rating - mean for spec, rating in ratings.items()}
+    return {spec: 1500 + rating for spec, rating in ratings.items()}
+
+
+def summarize(results, specs, seconds):
+    """Aggregate win/draw/loss, score margins, Elo and games per minute."""
+    players = {
+        spec: {"games": 0, "wins": 0, "draws": 0, "losses": 0, "margin_total": 0}
+        for spec in specs
+    }
+    for spec1, spec2, score1, score2, _ in results:
+        # Lower remaining score wins; margin is the opponent's score minus ours
+        for spec, own, other in ((spec1, score1, score2), (spec2, score2, score1)):
+            stats = players[spec]
+            stats["games"] += 1
+            stats["margin_total"] += other - own
+            if own < other:
+                stats["wins"] += 1
+            elif own == other:
+                stats["draws"] += 1
+            else:
+                stats["losses"] += 1
+    ratings = elo_ratings(results, specs)
+    for spec, stats in players.items():
+        stats["average_margin"] = stats.pop("margin_total") / stats["games"] if stats["games"] else 0.0
+        stats["elo"] = ratings[spec]
+    return {
+        "games": len(results),
+        "seconds": seconds,
+        "games_per_minute": 60 * len(results) / seconds if seconds > 0 else 0.0,
+        "players": players,
+    }
+
+
+def run_tournament(specs, games_per_pair=10, workers=None, seed=0, board_size=14, full_pieces=True,
+                   backend="bitboard"):
+    """
+    Round robin between the AI specs: `games_per_pair` games per pair,
+    alternating colours, spread over `workers` processes. Each game gets its
+    own seed derived from `seed`, so a tournament is reproducible.
+    """
+    for spec in specs:
+        parse_ai(spec)  # Fail early on a bad spec
+    config = {"board_size": board_size, "full_pieces": full_pieces, "backend": backend}
+    seeds = random.Random(seed)
+    tasks = []
+    for a, b in itertools.combinations(specs, 2):
+        for game_number in range(games_per_pair):
+            spec1, spec2 = (a, b) if game_number % 2 == 0 else (b, a)
+            tasks.append((spec1, spec2, seeds.randrange(2 ** 32), config))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        results = list(executor.map(play_game, tasks))
+    return summarize(results, specs, time.perf_counter() - start)
+
+
+def print_summary(summary):
+    print(f"{summary['games']} games in {summary['seconds']:.1f}s ({summary['games_per_minute']:.1f} games/min)")
+    print(f"{'AI':20s} {'games':>5s} {'W':>4s} {'D':>4s} {'L':>4s} {'margin':>7s} {'Elo':>6s}")
+    ranked = sorted(summary["players"].items(), key=lambda item: -item[1]["elo"])
+    for spec, stats in ranked:
+        print(f"{spec:20s} {stats['games']:5d} {stats['wins']:4d} {stats['draws']:4d} {stats['losses']:4d} "
+              f"{stats['average_margin']:7.1f} {stats['elo']:6.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Blokus Duo AI tournament")
+    parser.add_argument("ais", nargs="+", help="AI specs, e.g. random heuristic minimax:1 mcts:100")
+    parser.add_argument("--games", type=int, default=10, help="games per pair of AIs")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--board-size", type=int, default=14)
+    parser.add_argument("--small-pieces", action="store_true", help="use the small piece set")
+    parser.add_argument("--backend", choices=["list", "bitboard"], default="bitboard")
+    args = parser.parse_args()
+    if len(args.ais) < 2:
+        parser.error("give at least two AIs")
+
+    summary = run_tournament(args.ais, args.games, args.workers, args.seed, args.board_size,
+                             not args.small_pieces, args.backend)
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import random
+
+# Bound types of a stored score
+EXACT = 0
+LOWER = 1  # the true score is at least the stored score (beta cutoff)
+UPPER = 2  # the true score is at most the stored score (no move reached alpha)
+
+# Rough size of one stored entry (slot, entry tuple, key int and move tuple),
+# used to turn a memory cap into a number of slots.
+ENTRY_BYTES = 256
+
+
+class ZobristKeys:
+    """
+    Random 64-bit keys for Zobrist hashing of a position: one per
+    (cell, marker), one per (player, remaining piece ID) and one per side to
+    move. The hash of a position is the XOR of the keys of its features, so
+    placing a piece updates it with a few XORs.
+
+    With mirrored=True the hash functions give the hash of the position
+    mirrored in the main diagonal (see symmetry.py), using the cell keys of
+    the transposed cells.
+    """
+
+    def __init__(self, board_size, num_pieces, players, seed=2024):
+        rng = random.Random(seed)
+        self.cells = {
+            marker: [[rng.getrandbits(64) for _ in range(board_size)] for _ in range(board_size)]
+            for marker in ("X", "O")
+        }
+        self.mirror_cells = {
+            marker: [[keys[y][x] for y in range(board_size)] for x in range(board_size)]
+            for marker, keys in self.cells.items()
+        }
+        self.pieces = {player: [rng.getrandbits(64) for _ in range(num_pieces)] for player in players}
+        self.side = {player: rng.getrandbits(64) for player in players}
+
+    def hash_position(self, game, board, pieces, mirrored=False):
+        """Hash of a board plus remaining pieces, without the side to move."""
+        cells = self.mirror_cells if mirrored else self.cells
+        h = 0
+        for x in range(game.board_size):
+            for y in range(game.board_size):
+                marker = game.cell(board, x, y)
+                if marker is not None:
+                    h ^= cells[marker][x][y]
+        for player, remaining in pieces.items():
+            for piece in remaining:
+                h ^= self.pieces[player][game.catalogue.piece_id(piece)]
+        return h
+
+    def piece_delta(self, player, piece_id, piece, position, mirrored=False):
+        """XOR delta of `player` placing piece `piece_id` as `piece` at `position`."""
+        marker_keys = (self.mirror_cells if mirrored else self.cells)["X" if player == "Player 1" else "O"]
+        start_x, start_y = position
+        h = self.pieces[player][piece_id]
+        for dx, dy in piece:
+            h ^= marker_keys[start_x + dx][start_y + dy]
+        return h
+
+
+class TranspositionTable:
+    """
+    Fixed-size table of search results keyed by Zobrist hash.
+
+    memory_mb caps the table size (see ENTRY_BYTES). replacement decides
+    what happens when two positions map to the same slot:
+      "depth"  - keep the entry searched deeper, unless it is from an older
+                 search (new_search() starts a new generation)
+      "always" - the newest entry always wins
+    """
+
+    def __init__(self, memory_mb=16, replacement="depth"):
+        if replacement not in ("depth", "always"):
+            raise ValueError(f"Unknown replacement policy: {replacement}")
+        self.replacement = replacement
+        self.size = max(1, int(memory_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.slots = [None] * self.size
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.stores = 0
+        self.overwrites = 0
+        self.rejected = 0
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.reset_stats()
+
+    def new_search(self):
+        """Age existing entries so they can be replaced by the next search."""
+        self.generation += 1
+
+    def probe(self, key):
+        """Return (depth, score, bound, best_move) stored for `key`, or None."""
+        self.probes += 1
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:5]
+        return None
+
+    def store(self, key, depth, score, bound, best_move):
+        index = key % self.size
+        entry = self.slots[index]
+        if entry is not None and entry[0] != key:
+            if self.replacement == "depth" and entry[5] == self.generation and entry[1] > depth:
+                self.rejected += 1
+                return
+            self.overwrites += 1
+        self.stores += 1
+        self.slots[index] = (key, depth, score, bound, best_move, self.generation)
+
+    def stats(self):
+        """Hit-rate counters for tuning the table size."""
+        used = sum(1 for entry in self.slots if entry is not None)
+        return {
+            "size": self.size,
+            "used": used,
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+            "cutoffs": self.cutoffs,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "rejected": self.rejected,
+        }